@@ -13,6 +13,24 @@ from typing import Optional, Dict, Any
 import time
 import os
 
+from lib.vehicle_simulator import (
+    SIGNAL_RPM, SIGNAL_SPEED, SIGNAL_COOLANT_TEMP, SIGNAL_ENGINE_LOAD,
+    SIGNAL_THROTTLE, SIGNAL_FUEL_LEVEL, SIGNAL_MAF, SIGNAL_BATTERY_VOLTAGE,
+    SIGNAL_ENGINE_RUNTIME, SIGNAL_DISTANCE, SIGNAL_MIL
+)
+
+# Decimal places for state table values in JSON (hides float32 noise)
+STATE_DECIMALS = 2
+
+try:
+    from waitress import serve
+    HAVE_WAITRESS = True
+except ImportError:
+    HAVE_WAITRESS = False
+
+# Worker threads for the waitress server
+API_THREADS = 8
+
 
 class ControlAPI:
     """HTTP API for controlling the mock OBD system"""
@@ -199,6 +217,27 @@ class ControlAPI:
                 if not ecu:
                     return jsonify({'status': 'error', 'message': 'Engine ECU not found'}), 404
 
+                table = self.coordinator.state_table
+                if table is not None:
+                    # All fields from the same snapshot, taken after the last
+                    # simulation step or /api/vehicle/set
+                    row = table.arr[self.coordinator.get_ecu_index_by_type(ECUType.ENGINE)]
+                    row = row.astype(float).round(STATE_DECIMALS).tolist()
+                    state = {
+                        'rpm': row[SIGNAL_RPM],
+                        'speed': row[SIGNAL_SPEED],
+                        'coolant_temp': row[SIGNAL_COOLANT_TEMP],
+                        'engine_load': row[SIGNAL_ENGINE_LOAD],
+                        'throttle_position': row[SIGNAL_THROTTLE],
+                        'fuel_level': row[SIGNAL_FUEL_LEVEL],
+                        'maf': row[SIGNAL_MAF],
+                        'battery_voltage': row[SIGNAL_BATTERY_VOLTAGE],
+                        'mil_status': bool(row[SIGNAL_MIL]),
+                        'engine_runtime': row[SIGNAL_ENGINE_RUNTIME],
+                        'distance_traveled': row[SIGNAL_DISTANCE]
+                    }
+                    return jsonify({'status': 'ok', 'state': state})
+
                 sensors = ecu.vehicle.get_sensor_data()
                 state = {
                     'rpm': sensors.rpm,
@@ -238,6 +277,12 @@ class ControlAPI:
                 if 'throttle' in data:
                     ecu.vehicle.set_throttle(float(data['throttle']))
 
+                # Publish the new values now rather than at the next tick
+                table = self.coordinator.state_table
+                if table is not None:
+                    table.capture(self.coordinator.get_ecu_index_by_type(ECUType.ENGINE),
+                                  ecu.vehicle.sensors)
+
                 return jsonify({
                     'status': 'ok',
                     'message': 'Vehicle state updated',
@@ -303,7 +348,7 @@ class ControlAPI:
                 return jsonify({
                     'status': 'ok',
                     'ignition_state': ignition_state.value,
-                    'engine_state': ecu.vehicle.engine_state.value
+                    'engine_state': ecu.vehicle.engine_state.name.lower()
                 })
 
             except Exception as e:
@@ -427,8 +472,12 @@ class ControlAPI:
         print(f"[API] API health check at http://{self.host}:{self.port}/api/health")
 
     def _run_server(self):
-        """Run Flask server"""
-        self.app.run(host=self.host, port=self.port, debug=False, use_reloader=False)
+        """Run WSGI server (waitress if installed, else the Flask dev server)"""
+        if HAVE_WAITRESS:
+            serve(self.app, host=self.host, port=self.port, threads=API_THREADS)
+        else:
+            self.app.run(host=self.host, port=self.port, debug=False, use_reloader=False,
+                         threaded=True)
 
     def stop(self):
         """Stop API server"""
@@ -0,0 +1,288 @@
+"""
+Vectorized Fleet Simulator
+
+Simulates many running vehicles at once. Each sensor is stored as one NumPy
+array indexed by vehicle (structure-of-arrays), so a single tick updates the
+whole fleet with a handful of vector operations instead of one Python-level
+VehicleSimulator.update() per vehicle.
+
+The per-vehicle model mirrors VehicleSimulator._update_running_state. When
+Numba is installed the whole tick runs as one fused, parallel kernel that
+walks every array once; otherwise it falls back to NumPy vector operations.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from lib.vehicle_simulator import SensorData
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    # Numba is optional; the kernel still runs (slowly) as plain Python
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(parallel=True, cache=True)
+def _fleet_tick(rpm, throttle_position, engine_load, vehicle_speed,
+                distance_traveled, distance_since_clear, distance_with_mil, mil_status,
+                maf, coolant_temp, intake_air_temp, timing_advance, fuel_level, fuel_rate,
+                o2_voltage, short_term_fuel_trim, long_term_fuel_trim, catalyst_temp,
+                battery_voltage, engine_runtime, noise,
+                dt, rpm_idle, rpm_max, gear_ratio, target_temp, ambient_temp, fuel_capacity):
+    """
+    Fused running-state tick: every field of vehicle i is updated in one pass
+
+    Arrays are updated in place. noise is a (3, N) array of standard normals
+    for the RPM, MAF and coolant rows.
+    """
+    rpm_span = rpm_max - rpm_idle
+    for i in prange(rpm.shape[0]):
+        runtime = engine_runtime[i] + dt
+        engine_runtime[i] = runtime
+
+        # RPM: first-order lag towards throttle target plus noise
+        throttle_factor = throttle_position[i] * 0.01
+        r = rpm[i]
+        r += (rpm_idle + rpm_span * throttle_factor - r) * (dt / 0.5)
+        r += noise[0, i] * 10.0
+        r = min(max(r, rpm_idle * 0.9), rpm_max)
+        rpm[i] = r
+
+        # Engine load from throttle, RPM and speed
+        speed = vehicle_speed[i]
+        rpm_factor = (r - rpm_idle) / rpm_span
+        speed_factor = min(1.0, speed / 120.0)
+        load = throttle_factor * 100 * (0.5 + 0.5 * rpm_factor) * (0.7 + 0.3 * speed_factor)
+        load = min(max(load, 0.0), 100.0)
+        engine_load[i] = load
+
+        # Speed follows RPM above idle, coasts down otherwise
+        above_idle = r > rpm_idle
+        if above_idle:
+            speed += ((r - rpm_idle) / gear_ratio / 60.0 * 10 - speed) * dt
+        else:
+            speed = max(0.0, speed - 5 * dt)
+        vehicle_speed[i] = speed
+
+        # Distance
+        distance_km = speed * (dt / 3600.0)
+        distance_traveled[i] += distance_km
+        distance_since_clear[i] += distance_km
+        if mil_status[i]:
+            distance_with_mil[i] += distance_km
+
+        # MAF
+        maf[i] = max(0.0, (r / 1000.0) * (load / 100.0) * 5.0 + noise[1, i] * 0.1)
+
+        # Coolant warmup, then hold at operating temperature with noise
+        coolant = coolant_temp[i]
+        if coolant < target_temp:
+            coolant += (2.0 + load / 100.0 * 3.0) * dt
+        else:
+            coolant = target_temp + noise[2, i] * 0.5
+        coolant_temp[i] = coolant
+
+        intake_air_temp[i] = ambient_temp + load * 0.3
+        timing_advance[i] = (r / rpm_max) * 30 + (100 - load) / 100.0 * 10
+
+        # Fuel consumption
+        consumption_rate = load * 0.01 + (r / 1000.0) * 0.05
+        fuel_level[i] = max(0.0, fuel_level[i] - consumption_rate * (dt / 3600.0) / fuel_capacity * 100)
+        fuel_rate[i] = consumption_rate
+
+        # O2 oscillation and fuel trims
+        o2 = 0.45 + np.sin(runtime * 2) * 0.05
+        o2_voltage[i] = o2
+        stft = short_term_fuel_trim[i]
+        if o2 < 0.4:
+            stft = min(25.0, stft + dt * 2)
+        elif o2 > 0.5:
+            stft = max(-25.0, stft - dt * 2)
+        short_term_fuel_trim[i] = stft
+        long_term_fuel_trim[i] += (stft - long_term_fuel_trim[i]) * dt * 0.1
+
+        # Catalyst heats up once coolant is warm
+        if coolant > 70:
+            catalyst_temp[i] += (400 + load * 2 - catalyst_temp[i]) * dt * 0.1
+
+        # Battery voltage drops slightly under load
+        battery_voltage[i] = (14.2 if above_idle else 12.6) - (load / 100.0) * 0.3
+
+
+class VehicleFleetSimulator:
+    """Simulates N running vehicles with NumPy sensor arrays"""
+
+    # Sensor arrays kept per vehicle (names match SensorData fields)
+    FIELDS = (
+        'rpm', 'engine_load', 'coolant_temp', 'intake_air_temp', 'maf', 'timing_advance',
+        'throttle_position', 'fuel_level', 'fuel_rate',
+        'vehicle_speed', 'distance_traveled', 'distance_with_mil', 'distance_since_clear',
+        'battery_voltage', 'o2_voltage', 'short_term_fuel_trim', 'long_term_fuel_trim',
+        'catalyst_temp', 'engine_runtime',
+    )
+
+    # Long-running accumulators stay float64 so small per-tick increments
+    # are not lost to float32 rounding
+    ACCUMULATORS = ('distance_traveled', 'distance_with_mil', 'distance_since_clear',
+                    'fuel_level', 'engine_runtime')
+
+    def __init__(self, num_vehicles: int, config: Optional[Dict] = None, seed: Optional[int] = None):
+        """
+        Initialize fleet simulator
+
+        Args:
+            num_vehicles: Number of vehicles in the fleet
+            config: Configuration dictionary shared by all vehicles
+            seed: Seed for the sensor noise generator
+        """
+        config = config or {}
+        self.num_vehicles = num_vehicles
+        self.rng = np.random.default_rng(seed)
+
+        # Simulation parameters
+        self.rpm_idle = float(config.get('rpm_idle', 750))
+        self.rpm_max = float(config.get('rpm_max', 6500))
+        self.fuel_capacity = float(config.get('fuel_capacity', 50))  # liters
+        self.coolant_temp_normal = float(config.get('coolant_temp_normal', 90))
+        self.gear_ratio = 3.5
+        self.ambient_temp = 20.0  # °C
+
+        # Sensor arrays, initialized from SensorData defaults
+        defaults = SensorData()
+        for name in self.FIELDS:
+            dtype = np.float64 if name in self.ACCUMULATORS else np.float32
+            setattr(self, name, np.full(num_vehicles, getattr(defaults, name), dtype=dtype))
+        self.mil_status = np.zeros(num_vehicles, dtype=bool)
+
+        # All vehicles start running at idle
+        self.rpm[:] = self.rpm_idle
+
+    def update(self, dt: float):
+        """
+        Advance every vehicle by one tick
+
+        Args:
+            dt: Time delta in seconds
+        """
+        # RPM, MAF and coolant noise for the whole fleet in one draw
+        noise = self.rng.standard_normal((3, self.num_vehicles))
+
+        if HAVE_NUMBA:
+            _fleet_tick(self.rpm, self.throttle_position, self.engine_load, self.vehicle_speed,
+                        self.distance_traveled, self.distance_since_clear, self.distance_with_mil,
+                        self.mil_status, self.maf, self.coolant_temp, self.intake_air_temp,
+                        self.timing_advance, self.fuel_level, self.fuel_rate, self.o2_voltage,
+                        self.short_term_fuel_trim, self.long_term_fuel_trim, self.catalyst_temp,
+                        self.battery_voltage, self.engine_runtime, noise,
+                        dt, self.rpm_idle, self.rpm_max, self.gear_ratio,
+                        self.coolant_temp_normal, self.ambient_temp, self.fuel_capacity)
+        else:
+            self._update_vectorized(dt, noise)
+
+    def _update_vectorized(self, dt: float, noise: np.ndarray):
+        """NumPy fallback for update() when Numba is not installed"""
+        rpm_idle = self.rpm_idle
+        rpm_max = self.rpm_max
+        rpm_span = rpm_max - rpm_idle
+
+        rpm = self.rpm
+        load = self.engine_load
+        speed = self.vehicle_speed
+        coolant = self.coolant_temp
+
+        self.engine_runtime += dt
+
+        # RPM: first-order lag towards throttle target plus noise
+        throttle_factor = self.throttle_position * 0.01
+        target_rpm = rpm_idle + rpm_span * throttle_factor
+        rpm += (target_rpm - rpm) * (dt / 0.5)
+        rpm += noise[0] * 10
+        np.clip(rpm, rpm_idle * 0.9, rpm_max, out=rpm)
+
+        # Engine load from throttle, RPM and speed
+        rpm_factor = (rpm - rpm_idle) / rpm_span
+        speed_factor = np.minimum(1.0, speed / 120.0)
+        load[:] = throttle_factor * 100 * (0.5 + 0.5 * rpm_factor) * (0.7 + 0.3 * speed_factor)
+        np.clip(load, 0, 100, out=load)
+
+        # Speed follows RPM above idle, coasts down otherwise
+        above_idle = rpm > rpm_idle
+        target_speed = (rpm - rpm_idle) / self.gear_ratio / 60.0 * 10
+        speed[:] = np.where(above_idle,
+                            speed + (target_speed - speed) * dt,
+                            np.maximum(0, speed - 5 * dt))
+
+        # Distance
+        distance_km = speed * (dt / 3600.0)
+        self.distance_traveled += distance_km
+        self.distance_since_clear += distance_km
+        self.distance_with_mil += distance_km * self.mil_status
+
+        # MAF
+        maf = self.maf
+        maf[:] = (rpm / 1000.0) * (load / 100.0) * 5.0
+        maf += noise[1] * 0.1
+        np.maximum(maf, 0, out=maf)
+
+        # Coolant warmup, then hold at operating temperature with noise
+        target_temp = self.coolant_temp_normal
+        warmup = coolant + (2.0 + load / 100.0 * 3.0) * dt
+        at_temp = target_temp + noise[2] * 0.5
+        coolant[:] = np.where(coolant < target_temp, warmup, at_temp)
+
+        self.intake_air_temp[:] = self.ambient_temp + load * 0.3
+        self.timing_advance[:] = (rpm / rpm_max) * 30 + (100 - load) / 100.0 * 10
+
+        # Fuel consumption
+        consumption_rate = load * 0.01 + (rpm / 1000.0) * 0.05
+        self.fuel_level -= consumption_rate * (dt / 3600.0) / self.fuel_capacity * 100
+        np.maximum(self.fuel_level, 0, out=self.fuel_level)
+        self.fuel_rate[:] = consumption_rate
+
+        # O2 oscillation and fuel trims
+        o2 = self.o2_voltage
+        o2[:] = 0.45 + np.sin(self.engine_runtime * 2) * 0.05
+        stft = self.short_term_fuel_trim
+        stft[:] = np.where(o2 < 0.4, np.minimum(25, stft + dt * 2),
+                           np.where(o2 > 0.5, np.maximum(-25, stft - dt * 2), stft))
+        self.long_term_fuel_trim += (stft - self.long_term_fuel_trim) * dt * 0.1
+
+        # Catalyst heats up once coolant is warm
+        cat = self.catalyst_temp
+        cat[:] = np.where(coolant > 70, cat + (400 + load * 2 - cat) * dt * 0.1, cat)
+
+        # Battery voltage drops slightly under load
+        self.battery_voltage[:] = np.where(above_idle, 14.2, 12.6) - (load / 100.0) * 0.3
+
+    # Control methods
+
+    def set_throttle(self, position, index=None):
+        """
+        Set throttle position (0-100%)
+
+        Args:
+            position: Throttle position, scalar or per-vehicle array
+            index: Vehicle index/slice/mask (default: whole fleet)
+        """
+        value = np.clip(position, 0, 100)
+        if index is None:
+            self.throttle_position[:] = value
+        else:
+            self.throttle_position[index] = value
+
+    def get_sensor_data(self, index: int) -> SensorData:
+        """Get a SensorData snapshot for one vehicle"""
+        data = SensorData()
+        for name in self.FIELDS:
+            setattr(data, name, float(getattr(self, name)[index]))
+        data.mil_status = bool(self.mil_status[index])
+        return data
@@ -13,9 +13,10 @@ Frame Types:
 
 import can
 import time
+import asyncio
 import threading
 from enum import Enum
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Union
 from dataclasses import dataclass
 
 
@@ -147,6 +148,15 @@ class ISOTPSender:
         self.rx_id = rx_id
         self.config = config or ISOTPConfig()
 
+        # Non-blocking multi-frame state (see send_nowait)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[bytes] = None
+        self._offset = 0
+        self._seq_num = 1
+        self._block_left = 0
+        self._separation = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
     def send(self, payload: bytes) -> bool:
         """
         Send payload using ISO-TP protocol
@@ -223,6 +233,117 @@ class ISOTPSender:
             print(f"[ISO-TP] Error sending multi-frame: {e}")
             return False
 
+    def send_nowait(self, payload: bytes, loop: asyncio.AbstractEventLoop) -> bool:
+        """
+        Send payload without blocking the calling event loop
+
+        A single frame goes out immediately. For a multi-frame payload only the
+        first frame is sent; the caller must pass the peer's flow control
+        frames to on_flow_control(), and consecutive frames are then sent from
+        loop callbacks. A new send abandons one still in progress.
+
+        Args:
+            payload: Payload bytes
+            loop: Event loop running in the calling thread
+
+        Returns:
+            True if the (first) frame was sent
+        """
+        if len(payload) <= 7:
+            return self._send_single_frame(payload)
+
+        self._abort_pending()
+        try:
+            ff_data = ISOTPFrame.create_first_frame(len(payload), payload[:6], self.config.padding)
+            self.bus.send(can.Message(
+                arbitration_id=self.tx_id,
+                data=ff_data,
+                is_extended_id=False
+            ))
+        except Exception as e:
+            print(f"[ISO-TP] Error sending first frame: {e}")
+            return False
+
+        self._loop = loop
+        self._pending = payload
+        self._offset = 6
+        self._seq_num = 1
+        self._arm_fc_timeout()
+        return True
+
+    def on_flow_control(self, raw_frame: bytes):
+        """
+        Continue a send_nowait() transfer on a received flow control frame
+
+        Args:
+            raw_frame: CAN data of the flow control frame (PCI 0x3X)
+        """
+        if self._pending is None:
+            return
+        self._timer.cancel()
+
+        flow_status = raw_frame[0] & 0x0F
+        if flow_status == FlowStatus.CONTINUE_TO_SEND.value:
+            block_size = raw_frame[1] if len(raw_frame) > 1 else 0
+            stmin = raw_frame[2] if len(raw_frame) > 2 else 0
+            self._block_left = block_size or -1  # 0 = no further flow control
+            # STmin 0x00-0x7F is in ms, 0xF1-0xF9 in 100 us steps
+            self._separation = ((stmin - 0xF0) / 10000.0 if 0xF1 <= stmin <= 0xF9
+                                else min(stmin, 0x7F) / 1000.0)
+            self._send_block()
+        elif flow_status == FlowStatus.WAIT.value:
+            self._arm_fc_timeout()
+        else:  # Overflow
+            print("[ISO-TP] Flow control overflow")
+            self._abort_pending()
+
+    def _send_block(self):
+        """Send consecutive frames until done, the block ends or STmin requires a pause"""
+        payload = self._pending
+        if payload is None:
+            return
+        try:
+            while True:
+                chunk = payload[self._offset:self._offset + 7]
+                cf_data = ISOTPFrame.create_consecutive_frame(self._seq_num, chunk, self.config.padding)
+                self.bus.send(can.Message(
+                    arbitration_id=self.tx_id,
+                    data=cf_data,
+                    is_extended_id=False
+                ))
+                self._seq_num = (self._seq_num + 1) % 16
+                self._offset += 7
+
+                if self._offset >= len(payload):
+                    self._pending = None
+                    return
+
+                self._block_left -= 1
+                if self._block_left == 0:
+                    self._arm_fc_timeout()
+                    return
+                if self._separation > 0:
+                    self._timer = self._loop.call_later(self._separation, self._send_block)
+                    return
+        except Exception as e:
+            print(f"[ISO-TP] Error sending multi-frame: {e}")
+            self._pending = None
+
+    def _arm_fc_timeout(self):
+        """Give up on the pending transfer if no flow control arrives in time"""
+        self._timer = self._loop.call_later(self.config.timeout_ms / 1000.0, self._fc_timeout)
+
+    def _fc_timeout(self):
+        print("[ISO-TP] No flow control received")
+        self._pending = None
+
+    def _abort_pending(self):
+        """Drop a transfer still in progress"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = None
+
     def _wait_for_flow_control(self) -> bool:
         """Wait for flow control frame"""
         start_time = time.time()
@@ -275,13 +396,24 @@ class ISOTPReceiver:
         self.receiving = False
         self.expected_length = 0
         self.received_data = bytearray()
+        self.received_length = 0
         self.next_seq_num = 1
         self.last_frame_time = 0
 
-    def receive_frame(self, msg: can.Message) -> Optional[bytes]:
+        # True while reassembling into a caller-supplied buffer
+        self._into_out = False
+
+    def receive_frame(self, msg: can.Message,
+                      out: Optional[bytearray] = None) -> Optional[Union[bytes, memoryview]]:
         """
         Process incoming CAN frame
 
+        Args:
+            msg: Received CAN frame
+            out: Optional reusable buffer for multi-frame reassembly. When it
+                 can hold the whole payload, the result is a memoryview into
+                 it, valid until the buffer receives the next message.
+
         Returns:
             Complete payload if message is complete, None if waiting for more frames
         """
@@ -295,7 +427,7 @@ class ISOTPReceiver:
                 return self._handle_single_frame(data)
 
             elif frame_type == FrameType.FIRST_FRAME:
-                return self._handle_first_frame(data, bytes(msg.data))
+                return self._handle_first_frame(data, bytes(msg.data), out)
 
             elif frame_type == FrameType.CONSECUTIVE_FRAME:
                 return self._handle_consecutive_frame(data, bytes(msg.data))
@@ -313,15 +445,23 @@ class ISOTPReceiver:
         self._reset_reception()
         return data
 
-    def _handle_first_frame(self, data: bytes, raw_frame: bytes) -> Optional[bytes]:
+    def _handle_first_frame(self, data: bytes, raw_frame: bytes,
+                            out: Optional[bytearray] = None) -> Optional[bytes]:
         """Handle first frame reception"""
         # Extract total length from PCI bytes
         pci_high = raw_frame[0]
         pci_low = raw_frame[1]
         self.expected_length = ((pci_high & 0x0F) << 8) | pci_low
 
+        # Reassemble in place: into the caller's buffer if it is large
+        # enough, otherwise into one allocated at the final size
+        self._into_out = out is not None and len(out) >= self.expected_length
+        self.received_data = out if self._into_out else bytearray(self.expected_length)
+
         # Store first 6 bytes of data
-        self.received_data = bytearray(data[:6])
+        chunk = data[:min(6, self.expected_length)]
+        self.received_data[:len(chunk)] = chunk
+        self.received_length = len(chunk)
         self.next_seq_num = 1
         self.receiving = True
         self.last_frame_time = time.time()
@@ -350,17 +490,21 @@ class ISOTPReceiver:
             return None
 
         # Add data
-        remaining = self.expected_length - len(self.received_data)
-        chunk_size = min(7, remaining)
-        self.received_data.extend(data[:chunk_size])
+        pos = self.received_length
+        chunk = data[:min(7, self.expected_length - pos)]
+        self.received_data[pos:pos + len(chunk)] = chunk
+        self.received_length = pos + len(chunk)
 
         # Update state
         self.next_seq_num = (self.next_seq_num + 1) % 16
         self.last_frame_time = time.time()
 
         # Check if complete
-        if len(self.received_data) >= self.expected_length:
-            payload = bytes(self.received_data[:self.expected_length])
+        if self.received_length >= self.expected_length:
+            if self._into_out:
+                payload = memoryview(self.received_data)[:self.expected_length]
+            else:
+                payload = bytes(self.received_data)
             self._reset_reception()
             return payload
 
@@ -389,8 +533,10 @@ class ISOTPReceiver:
         self.receiving = False
         self.expected_length = 0
         self.received_data = bytearray()
+        self.received_length = 0
         self.next_seq_num = 1
         self.last_frame_time = 0
+        self._into_out = False
 
 
 class ISOTPHandler:
@@ -413,9 +559,10 @@ class ISOTPHandler:
         """Send payload using ISO-TP protocol"""
         return self.sender.send(payload)
 
-    def receive_frame(self, msg: can.Message) -> Optional[bytes]:
-        """Process incoming frame and return complete payload if ready"""
-        return self.receiver.receive_frame(msg)
+    def receive_frame(self, msg: can.Message,
+                      out: Optional[bytearray] = None) -> Optional[Union[bytes, memoryview]]:
+        """Process incoming frame and return complete payload if ready (see ISOTPReceiver.receive_frame)"""
+        return self.receiver.receive_frame(msg, out)
 
     def is_receiving(self) -> bool:
         """Check if currently receiving a multi-frame message"""
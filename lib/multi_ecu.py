@@ -9,6 +9,8 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from lib.vehicle_simulator import VehicleStateTable
+
 
 class ECUType(Enum):
     """ECU types in vehicle"""
@@ -94,6 +96,9 @@ class MultiECUCoordinator:
         self.ecus: Dict[str, 'MockECU'] = {}  # name -> ECU instance
         self.ecu_identities: Dict[str, ECUIdentity] = {}  # name -> identity
 
+        # Per-ECU sensor snapshot, rows in registration order (set by the owner)
+        self.state_table: Optional[VehicleStateTable] = None
+
     def register_ecu(self, identity: ECUIdentity, ecu_instance: 'MockECU'):
         """
         Register an ECU with the coordinator
@@ -141,6 +146,13 @@ class MultiECUCoordinator:
                 return self.ecus.get(name)
         return None
 
+    def get_ecu_index_by_type(self, ecu_type: ECUType) -> Optional[int]:
+        """Get registration index (state table row) of ECU by type"""
+        for index, identity in enumerate(self.ecu_identities.values()):
+            if identity.ecu_type == ecu_type:
+                return index
+        return None
+
     def list_ecus(self) -> List[ECUIdentity]:
         """Get list of all registered ECU identities"""
         return list(self.ecu_identities.values())
@@ -0,0 +1,63 @@
+"""
+OBD-II/UDS Response Parsers
+
+Byte-level decoding of diagnostic responses used by the test clients.
+
+This module is fully type-annotated so it can be compiled with mypyc
+(``mypyc lib/obd_parsers.py``); the compiled extension is picked up
+transparently by ``from lib.obd_parsers import ...``.
+"""
+
+from typing import List, Tuple, Union
+
+# Readiness monitors in Mode 01 PID 01 as (name, supported byte, supported
+# mask, incomplete byte, incomplete mask); byte indices are into the response
+# payload (41 01 A B C D). Continuous monitors use byte B, the rest bytes C/D.
+MONITOR_BITS: Tuple[Tuple[str, int, int, int, int], ...] = (
+    ("Misfire", 3, 0x01, 3, 0x10),
+    ("Fuel System", 3, 0x02, 3, 0x20),
+    ("Components", 3, 0x04, 3, 0x40),
+    ("Catalyst", 4, 0x01, 5, 0x01),
+    ("Heated Catalyst", 4, 0x02, 5, 0x02),
+    ("EVAP", 4, 0x04, 5, 0x04),
+    ("Secondary Air", 4, 0x08, 5, 0x08),
+    ("O2 Sensor", 4, 0x20, 5, 0x20),
+    ("O2 Heater", 4, 0x40, 5, 0x40),
+    ("EGR", 4, 0x80, 5, 0x80),
+)
+
+
+def parse_monitor_status(buf: Union[bytes, memoryview]) -> Tuple[bool, int, List[Tuple[str, bool]]]:
+    """
+    Decode a Mode 01 PID 01 response
+
+    Args:
+        buf: Response payload (41 01 A B C D), bytes or a memoryview
+
+    Returns:
+        Tuple of (MIL on, DTC count, (name, complete) per supported monitor)
+    """
+    a: int = buf[2]
+    monitors: List[Tuple[str, bool]] = [
+        (name, not buf[inc_byte] & inc_mask)
+        for name, sup_byte, sup_mask, inc_byte, inc_mask in MONITOR_BITS
+        if buf[sup_byte] & sup_mask
+    ]
+    return bool(a & 0x80), a & 0x7F, monitors
+
+
+def parse_ascii(buf: Union[bytes, memoryview], start: int, end: int = -1) -> str:
+    """
+    Decode a NUL-padded ASCII field (VIN, version strings)
+
+    Args:
+        buf: Response payload, bytes or a memoryview
+        start: Index of the first character
+        end: Index past the last character (default: end of payload)
+
+    Returns:
+        Decoded text with trailing padding removed
+    """
+    if end < 0 or end > len(buf):
+        end = len(buf)
+    return bytes(buf[start:end]).decode('ascii', errors='ignore').rstrip('\x00')
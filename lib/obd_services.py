@@ -72,12 +72,27 @@ class OBDServiceHandler:
             # Negative response: service not supported
             return bytes([0x7F, mode, 0x11])
 
+    def _mode_01_multi(self, request: bytes) -> bytes:
+        """Mode 01 - Up to six PIDs in one request (41 PID data PID data ...)"""
+        response = bytearray(b'\x41')
+        for pid in request[1:7]:
+            single = self._mode_01_current_data(bytes((0x01, pid)))
+            if single[0] == 0x41:
+                response += single[1:]
+
+        if len(response) == 1:
+            return bytes([0x7F, 0x01, 0x12])  # None of the PIDs supported
+        return bytes(response)
+
     # Mode 01: Show Current Data
     def _mode_01_current_data(self, request: bytes) -> bytes:
         """Mode 01 - Current data PIDs"""
         if len(request) < 2:
             return bytes([0x7F, 0x01, 0x12])  # Sub-function not supported
 
+        if len(request) > 2:
+            return self._mode_01_multi(request)
+
         pid = request[1]
         sensors = self.vehicle.get_sensor_data()
         drive_cycle = self.vehicle.get_drive_cycle()
@@ -89,40 +104,9 @@ class OBDServiceHandler:
 
         # PID 0x01: Monitor status (CRITICAL - MIL, DTC count, readiness)
         elif pid == 0x01:
-            dtc_count = min(127, self.dtc_manager.get_dtc_count())
-            mil_on = 0x80 if self.dtc_manager.is_mil_on() else 0x00
-            byte_a = mil_on | dtc_count
-
-            # Readiness monitors (simplified)
-            # Byte B: Test availability/completion
-            # Bits: 0=Misfire, 1=Fuel, 2=Components
-            byte_b = 0x07  # All tests available
-            if drive_cycle.misfire_monitor_complete:
-                byte_b &= ~0x01
-            if drive_cycle.fuel_system_monitor_complete:
-                byte_b &= ~0x02
-            if drive_cycle.component_monitor_complete:
-                byte_b &= ~0x04
-
-            # Byte C: Catalyst, Heated catalyst, EVAP, Secondary air
-            byte_c = 0x0F
-            if drive_cycle.catalyst_monitor_complete:
-                byte_c &= ~0x01
-            if drive_cycle.heated_catalyst_monitor_complete:
-                byte_c &= ~0x02
-            if drive_cycle.evap_system_monitor_complete:
-                byte_c &= ~0x04
-
-            # Byte D: O2 sensor, O2 heater, EGR
-            byte_d = 0x07
-            if drive_cycle.oxygen_sensor_monitor_complete:
-                byte_d &= ~0x01
-            if drive_cycle.oxygen_sensor_heater_complete:
-                byte_d &= ~0x02
-            if drive_cycle.egr_system_monitor_complete:
-                byte_d &= ~0x04
-
-            return bytes([0x41, 0x01, byte_a, byte_b, byte_c, byte_d])
+            # MIL, DTC count and readiness (1 = monitor not complete)
+            return b'\x41\x01' + drive_cycle.build_pid01_bytes(
+                self.dtc_manager.is_mil_on(), self.dtc_manager.get_dtc_count())
 
         # PID 0x03: Fuel system status
         elif pid == 0x03:
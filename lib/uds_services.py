@@ -2,17 +2,48 @@
 Advanced UDS (Unified Diagnostic Services) Handler
 
 Implements professional-grade UDS services as per ISO 14229 standard.
+
+This module is fully type-annotated so it can be compiled with mypyc
+(``mypyc lib/uds_services.py``); the compiled extension is picked up
+transparently by ``from lib.uds_services import ...``.
 """
 
 import time
 import random
-from typing import Optional, Dict
-from enum import Enum
+import struct
+from typing import Optional, Dict, List, Callable
+from enum import IntEnum
 from lib.vehicle_simulator import VehicleSimulator
 from lib.dtc_manager import DTCManager
 
+# Big-endian 16-bit DID / routine identifier
+_U16 = struct.Struct('>H')
+
+# Security access key constant (key = seed XOR constant)
+_SEC_CONST_BYTES = (0x12345678).to_bytes(4, 'big')
+
+# Minimum request length (service byte included) per service
+_MIN_LEN = {
+    0x10: 2, 0x11: 2, 0x14: 4, 0x19: 2, 0x22: 3, 0x27: 2, 0x28: 3,
+    0x2E: 4, 0x2F: 4, 0x31: 4, 0x36: 2, 0x3E: 2, 0x85: 2,
+}
+
+# Precomputed acknowledgements for services that only echo their sub-function
+_SERVICE_11_RESP = {reset_type: bytes((0x51, reset_type)) for reset_type in (0x01, 0x02, 0x03)}
+_SERVICE_28_RESP = tuple(bytes((0x68, i)) for i in range(256))
+_SERVICE_36_RESP = tuple(bytes((0x76, i)) for i in range(256))
+_SERVICE_37_OK = b'\x77'
+
+# I/O control entry flag (low bit holds the commanded state)
+IO_CONTROLLED = 0x80
 
-class DiagnosticSession(Enum):
+# Routine status values
+ROUTINE_ABSENT = 0
+ROUTINE_RUNNING = 1
+ROUTINE_STOPPED = 2
+
+
+class DiagnosticSession(IntEnum):
     """UDS diagnostic session types"""
     DEFAULT = 0x01
     PROGRAMMING = 0x02
@@ -20,7 +51,7 @@ class DiagnosticSession(Enum):
     SAFETY_SYSTEM = 0x04
 
 
-class SecurityLevel(Enum):
+class SecurityLevel(IntEnum):
     """Security access levels"""
     LOCKED = 0x00
     LEVEL_1 = 0x01  # Basic access
@@ -30,7 +61,7 @@ class SecurityLevel(Enum):
 class UDSServiceHandler:
     """Handles all UDS service requests"""
 
-    def __init__(self, vehicle: VehicleSimulator, dtc_manager: DTCManager, config: Optional[dict] = None):
+    def __init__(self, vehicle: VehicleSimulator, dtc_manager: DTCManager, config: Optional[dict] = None) -> None:
         """
         Initialize UDS service handler
 
@@ -41,27 +72,50 @@ class UDSServiceHandler:
         """
         self.vehicle = vehicle
         self.dtc_manager = dtc_manager
-        self.config = config or {}
+        self.config: dict = config or {}
 
         # Session state
-        self.current_session = DiagnosticSession.DEFAULT
-        self.security_level = SecurityLevel.LOCKED
-        self.session_start_time = 0.0
-        self.session_timeout = 5.0  # S3 server timeout (seconds)
+        self.current_session: DiagnosticSession = DiagnosticSession.DEFAULT
+        self.security_level: SecurityLevel = SecurityLevel.LOCKED
+        self.session_start_time: float = 0.0
+        self.session_timeout: float = 5.0  # S3 server timeout (seconds)
 
         # Security access
-        self.current_seed = None
-        self.security_attempts = 0
-        self.max_security_attempts = 3
+        self._seed_bytes: Optional[bytes] = None
+        self.security_attempts: int = 0
+        self.max_security_attempts: int = 3
 
-        # I/O Control state
-        self.io_controls: Dict[int, bool] = {}  # DID -> state
+        # I/O Control state, indexed by DID: 0 = ECU control, else IO_CONTROLLED | state
+        self._io_controls = bytearray(0x10000)
 
-        # Routine state
-        self.active_routines: Dict[int, str] = {}  # Routine ID -> status
+        # Routine state, indexed by routine ID
+        self._routine_status = bytearray(0x10000)
 
         # DIDs (Data Identifiers)
-        self.dids = self._initialize_dids()
+        self.dids: Dict[int, bytes] = self._initialize_dids()
+
+        # Direct-mapped cache of recent 0x22 responses, slot = DID & 0xF
+        self._did_cache_key: List[int] = [0] * 16
+        self._did_cache_val: List[Optional[bytes]] = [None] * 16
+
+        # Service dispatch table
+        self._dispatch: Dict[int, Callable[[memoryview, int], Optional[bytes]]] = {
+            0x10: self._service_10_diagnostic_session,
+            0x11: self._service_11_ecu_reset,
+            0x14: self._service_14_clear_dtc,
+            0x19: self._service_19_read_dtc_info,
+            0x22: self._service_22_read_data_by_id,
+            0x27: self._service_27_security_access,
+            0x28: self._service_28_communication_control,
+            0x2E: self._service_2E_write_data_by_id,
+            0x2F: self._service_2F_io_control,
+            0x31: self._service_31_routine_control,
+            0x34: self._service_34_request_download,
+            0x36: self._service_36_transfer_data,
+            0x37: self._service_37_transfer_exit,
+            0x3E: self._service_3E_tester_present,
+            0x85: self._service_85_control_dtc_setting,
+        }
 
     def _initialize_dids(self) -> Dict[int, bytes]:
         """Initialize supported Data Identifiers"""
@@ -91,10 +145,23 @@ class UDSServiceHandler:
         Returns:
             Response bytes or None for invalid request
         """
-        if len(request) < 1:
+        return self.process_mv(memoryview(request), len(request))
+
+    def process_mv(self, mv: memoryview, length: int) -> Optional[bytes]:
+        """
+        Process UDS service request from a buffer view
+
+        Args:
+            mv: View over the service request bytes
+            length: Number of valid bytes in the view
+
+        Returns:
+            Response bytes or None for invalid request
+        """
+        if length < 1:
             return None
 
-        service = request[0]
+        service = mv[0]
 
         # Check session timeout (except for tester present)
         if service != 0x3E:
@@ -105,51 +172,24 @@ class UDSServiceHandler:
                     self.security_level = SecurityLevel.LOCKED
 
         # Route to service handlers
-        if service == 0x10:
-            return self._service_10_diagnostic_session(request)
-        elif service == 0x11:
-            return self._service_11_ecu_reset(request)
-        elif service == 0x14:
-            return self._service_14_clear_dtc(request)
-        elif service == 0x19:
-            return self._service_19_read_dtc_info(request)
-        elif service == 0x22:
-            return self._service_22_read_data_by_id(request)
-        elif service == 0x27:
-            return self._service_27_security_access(request)
-        elif service == 0x28:
-            return self._service_28_communication_control(request)
-        elif service == 0x2E:
-            return self._service_2E_write_data_by_id(request)
-        elif service == 0x2F:
-            return self._service_2F_io_control(request)
-        elif service == 0x31:
-            return self._service_31_routine_control(request)
-        elif service == 0x34:
-            return self._service_34_request_download(request)
-        elif service == 0x36:
-            return self._service_36_transfer_data(request)
-        elif service == 0x37:
-            return self._service_37_transfer_exit(request)
-        elif service == 0x3E:
-            return self._service_3E_tester_present(request)
-        elif service == 0x85:
-            return self._service_85_control_dtc_setting(request)
-        else:
+        handler = self._dispatch.get(service)
+        if handler is None:
             # Service not supported
             return self._negative_response(service, 0x11)
 
+        if length < _MIN_LEN.get(service, 1):
+            return self._negative_response(service, 0x13)  # Incorrect message length
+
+        return handler(mv, length)
+
     def _negative_response(self, service: int, nrc: int) -> bytes:
         """Generate negative response"""
         return bytes([0x7F, service, nrc])
 
     # Service 0x10: Diagnostic Session Control
-    def _service_10_diagnostic_session(self, request: bytes) -> bytes:
+    def _service_10_diagnostic_session(self, mv: memoryview, length: int) -> bytes:
         """Service 0x10 - Diagnostic session control"""
-        if len(request) < 2:
-            return self._negative_response(0x10, 0x13)  # Incorrect message length
-
-        session_type = request[1]
+        session_type = mv[1]
 
         # Validate session type
         if session_type not in [0x01, 0x02, 0x03, 0x04]:
@@ -166,28 +206,21 @@ class UDSServiceHandler:
         return bytes([0x50, session_type, 0x00, 0x32, 0x01, 0xF4])
 
     # Service 0x11: ECU Reset
-    def _service_11_ecu_reset(self, request: bytes) -> bytes:
+    def _service_11_ecu_reset(self, mv: memoryview, length: int) -> bytes:
         """Service 0x11 - ECU reset"""
-        if len(request) < 2:
-            return self._negative_response(0x11, 0x13)
-
-        reset_type = request[1]
-
         # 0x01 = Hard reset, 0x02 = Key off/on, 0x03 = Soft reset
-        if reset_type not in [0x01, 0x02, 0x03]:
+        response = _SERVICE_11_RESP.get(mv[1])
+        if response is None:
             return self._negative_response(0x11, 0x12)
 
         # In simulation, just acknowledge
-        return bytes([0x51, reset_type])
+        return response
 
     # Service 0x14: Clear Diagnostic Information
-    def _service_14_clear_dtc(self, request: bytes) -> bytes:
+    def _service_14_clear_dtc(self, mv: memoryview, length: int) -> bytes:
         """Service 0x14 - Clear diagnostic information"""
-        if len(request) < 4:
-            return self._negative_response(0x14, 0x13)
-
         # Group of DTC (e.g., 0xFFFFFF = all)
-        dtc_group = (request[1] << 16) | (request[2] << 8) | request[3]
+        dtc_group = (mv[1] << 16) | (mv[2] << 8) | mv[3]
 
         # Clear DTCs
         if dtc_group == 0xFFFFFF:
@@ -197,12 +230,9 @@ class UDSServiceHandler:
         return bytes([0x54])
 
     # Service 0x19: Read DTC Information
-    def _service_19_read_dtc_info(self, request: bytes) -> bytes:
+    def _service_19_read_dtc_info(self, mv: memoryview, length: int) -> bytes:
         """Service 0x19 - Read DTC information"""
-        if len(request) < 2:
-            return self._negative_response(0x19, 0x13)
-
-        sub_function = request[1]
+        sub_function = mv[1]
 
         # Sub 0x01: Report number of DTCs by status mask
         if sub_function == 0x01:
@@ -212,10 +242,10 @@ class UDSServiceHandler:
 
         # Sub 0x02: Report DTC by status mask
         elif sub_function == 0x02:
-            if len(request) < 3:
+            if length < 3:
                 return self._negative_response(0x19, 0x13)
 
-            status_mask = request[2]
+            status_mask = mv[2]
             # Get all active DTCs
             dtcs = self.dtc_manager.get_all_active_dtcs()
 
@@ -249,26 +279,48 @@ class UDSServiceHandler:
             return self._negative_response(0x19, 0x12)
 
     # Service 0x22: Read Data By Identifier
-    def _service_22_read_data_by_id(self, request: bytes) -> bytes:
+    def _service_22_read_data_by_id(self, mv: memoryview, length: int) -> bytes:
         """Service 0x22 - Read data by identifier"""
-        if len(request) < 3:
-            return self._negative_response(0x22, 0x13)
+        if length > 3:
+            return self._read_multiple_dids(mv, length)
+
+        did = _U16.unpack_from(mv, 1)[0]
 
-        did = (request[1] << 8) | request[2]
+        slot = did & 0xF
+        cached = self._did_cache_val[slot]
+        if cached is not None and self._did_cache_key[slot] == did:
+            return cached
 
         if did not in self.dids:
             return self._negative_response(0x22, 0x31)  # Request out of range
 
-        data = self.dids[did]
-        return bytes([0x62, request[1], request[2]]) + data
+        response = b'\x62' + bytes(mv[1:3]) + self.dids[did]
+        self._did_cache_key[slot] = did
+        self._did_cache_val[slot] = response
+        return response
+
+    def _read_multiple_dids(self, mv: memoryview, length: int) -> bytes:
+        """Service 0x22 with several DIDs - response is 62 DID data DID data ..."""
+        if length % 2 == 0:
+            return self._negative_response(0x22, 0x13)  # Incomplete DID
+
+        # Unsupported DIDs are left out; the request fails only if none is known
+        response = bytearray(b'\x62')
+        dids = self.dids
+        for offset in range(1, length, 2):
+            data = dids.get(_U16.unpack_from(mv, offset)[0])
+            if data is not None:
+                response += mv[offset:offset + 2]
+                response += data
+
+        if len(response) == 1:
+            return self._negative_response(0x22, 0x31)  # Request out of range
+        return bytes(response)
 
     # Service 0x27: Security Access
-    def _service_27_security_access(self, request: bytes) -> bytes:
+    def _service_27_security_access(self, mv: memoryview, length: int) -> bytes:
         """Service 0x27 - Security access"""
-        if len(request) < 2:
-            return self._negative_response(0x27, 0x13)
-
-        sub_function = request[1]
+        sub_function = mv[1]
 
         # Odd sub-functions = request seed
         if sub_function % 2 == 1:
@@ -284,91 +336,79 @@ class UDSServiceHandler:
                 return self._negative_response(0x27, 0x36)  # Exceeded number of attempts
 
             # Generate seed (simplified: random 4 bytes)
-            self.current_seed = random.randint(0x10000000, 0xFFFFFFFF)
-            seed_bytes = self.current_seed.to_bytes(4, 'big')
+            self._seed_bytes = random.randint(0x10000000, 0xFFFFFFFF).to_bytes(4, 'big')
 
-            return bytes([0x67, sub_function]) + seed_bytes
+            return bytes([0x67, sub_function]) + self._seed_bytes
 
         # Even sub-functions = send key
         elif sub_function % 2 == 0:
-            if len(request) < 6:
+            if length < 6:
                 return self._negative_response(0x27, 0x13)
 
             level = sub_function // 2
-            provided_key = int.from_bytes(request[2:6], 'big')
+            provided_key = bytes(mv[2:6])
 
             # Check if seed was requested
-            if self.current_seed is None:
+            if self._seed_bytes is None:
                 return self._negative_response(0x27, 0x24)  # Request sequence error
 
             # Calculate expected key (simplified: XOR with constant)
-            expected_key = self.current_seed ^ 0x12345678
+            expected_key = bytes(a ^ b for a, b in zip(self._seed_bytes, _SEC_CONST_BYTES))
 
             if provided_key == expected_key:
                 # Correct key
                 self.security_level = SecurityLevel(level)
                 self.security_attempts = 0
-                self.current_seed = None
+                self._seed_bytes = None
                 return bytes([0x67, sub_function])
             else:
                 # Incorrect key
                 self.security_attempts += 1
-                self.current_seed = None
+                self._seed_bytes = None
                 return self._negative_response(0x27, 0x35)  # Invalid key
 
         else:
             return self._negative_response(0x27, 0x12)
 
     # Service 0x28: Communication Control
-    def _service_28_communication_control(self, request: bytes) -> bytes:
+    def _service_28_communication_control(self, mv: memoryview, length: int) -> bytes:
         """Service 0x28 - Communication control"""
-        if len(request) < 3:
-            return self._negative_response(0x28, 0x13)
-
-        control_type = request[1]
-        communication_type = request[2]
-
+        # Control type:
         # 0x00 = Enable RX and TX
         # 0x01 = Enable RX, disable TX
         # 0x02 = Disable RX, enable TX
         # 0x03 = Disable RX and TX
 
         # In simulation, just acknowledge
-        return bytes([0x68, control_type])
+        return _SERVICE_28_RESP[mv[1]]
 
     # Service 0x2E: Write Data By Identifier
-    def _service_2E_write_data_by_id(self, request: bytes) -> bytes:
+    def _service_2E_write_data_by_id(self, mv: memoryview, length: int) -> bytes:
         """Service 0x2E - Write data by identifier"""
-        if len(request) < 4:
-            return self._negative_response(0x2E, 0x13)
-
         # Security check
         if self.security_level == SecurityLevel.LOCKED:
             return self._negative_response(0x2E, 0x33)  # Security access denied
 
-        did = (request[1] << 8) | request[2]
-        data = request[3:]
+        did = _U16.unpack_from(mv, 1)[0]
 
         if did not in self.dids:
             return self._negative_response(0x2E, 0x31)  # Request out of range
 
         # Update DID value
-        self.dids[did] = data
+        self.dids[did] = bytes(mv[3:length])
+        self._did_cache_val[did & 0xF] = None
 
-        return bytes([0x6E, request[1], request[2]])
+        return b'\x6e' + bytes(mv[1:3])
 
     # Service 0x2F: Input/Output Control By Identifier
-    def _service_2F_io_control(self, request: bytes) -> bytes:
+    def _service_2F_io_control(self, mv: memoryview, length: int) -> bytes:
         """Service 0x2F - I/O control by identifier"""
-        if len(request) < 4:
-            return self._negative_response(0x2F, 0x13)
-
         # Security/session check
         if self.current_session != DiagnosticSession.EXTENDED:
             return self._negative_response(0x2F, 0x7F)  # Service not supported in active session
 
-        did = (request[1] << 8) | request[2]
-        control_param = request[3]
+        did = _U16.unpack_from(mv, 1)[0]
+        control_param = mv[3]
 
         # 0x00 = Return control to ECU
         # 0x01 = Reset to default
@@ -377,23 +417,19 @@ class UDSServiceHandler:
 
         if control_param == 0x00:
             # Return control to ECU
-            if did in self.io_controls:
-                del self.io_controls[did]
+            self._io_controls[did] = 0
         else:
             # Take control
-            control_state = request[4] if len(request) > 4 else 0
-            self.io_controls[did] = bool(control_state)
+            control_state = mv[4] if length > 4 else 0
+            self._io_controls[did] = IO_CONTROLLED | (1 if control_state else 0)
 
-        return bytes([0x6F, request[1], request[2], control_param])
+        return b'\x6f' + bytes(mv[1:4])
 
     # Service 0x31: Routine Control
-    def _service_31_routine_control(self, request: bytes) -> bytes:
+    def _service_31_routine_control(self, mv: memoryview, length: int) -> bytes:
         """Service 0x31 - Routine control"""
-        if len(request) < 4:
-            return self._negative_response(0x31, 0x13)
-
-        sub_function = request[1]
-        routine_id = (request[2] << 8) | request[3]
+        sub_function = mv[1]
+        routine_id = _U16.unpack_from(mv, 2)[0]
 
         # Sub-functions: 0x01 = Start, 0x02 = Stop, 0x03 = Request results
 
@@ -402,23 +438,23 @@ class UDSServiceHandler:
             if self.current_session == DiagnosticSession.DEFAULT:
                 return self._negative_response(0x31, 0x7F)
 
-            self.active_routines[routine_id] = "running"
-            return bytes([0x71, 0x01, request[2], request[3], 0x00])  # Routine started
+            self._routine_status[routine_id] = ROUTINE_RUNNING
+            return b'\x71' + bytes(mv[1:4]) + b'\x00'  # Routine started
 
         elif sub_function == 0x02:  # Stop routine
-            if routine_id in self.active_routines:
-                self.active_routines[routine_id] = "stopped"
-            return bytes([0x71, 0x02, request[2], request[3], 0x00])
+            if self._routine_status[routine_id]:
+                self._routine_status[routine_id] = ROUTINE_STOPPED
+            return b'\x71' + bytes(mv[1:4]) + b'\x00'
 
         elif sub_function == 0x03:  # Request results
-            status = 0x00 if routine_id in self.active_routines else 0x01
-            return bytes([0x71, 0x03, request[2], request[3], status])
+            status = 0x00 if self._routine_status[routine_id] else 0x01
+            return b'\x71' + bytes(mv[1:4]) + bytes((status,))
 
         else:
             return self._negative_response(0x31, 0x12)
 
     # Service 0x34: Request Download
-    def _service_34_request_download(self, request: bytes) -> bytes:
+    def _service_34_request_download(self, mv: memoryview, length: int) -> bytes:
         """Service 0x34 - Request download (firmware update)"""
         # Requires programming session and security
         if self.current_session != DiagnosticSession.PROGRAMMING:
@@ -432,28 +468,21 @@ class UDSServiceHandler:
         return bytes([0x74, 0x20, 0x10, 0x00])  # Max block length = 0x1000
 
     # Service 0x36: Transfer Data
-    def _service_36_transfer_data(self, request: bytes) -> bytes:
+    def _service_36_transfer_data(self, mv: memoryview, length: int) -> bytes:
         """Service 0x36 - Transfer data"""
-        if len(request) < 2:
-            return self._negative_response(0x36, 0x13)
-
-        block_seq = request[1]
-        # In simulation, just acknowledge
-        return bytes([0x76, block_seq])
+        # In simulation, just acknowledge the block sequence counter
+        return _SERVICE_36_RESP[mv[1]]
 
     # Service 0x37: Request Transfer Exit
-    def _service_37_transfer_exit(self, request: bytes) -> bytes:
+    def _service_37_transfer_exit(self, mv: memoryview, length: int) -> bytes:
         """Service 0x37 - Request transfer exit"""
         # In simulation, just acknowledge
-        return bytes([0x77])
+        return _SERVICE_37_OK
 
     # Service 0x3E: Tester Present
-    def _service_3E_tester_present(self, request: bytes) -> bytes:
+    def _service_3E_tester_present(self, mv: memoryview, length: int) -> Optional[bytes]:
         """Service 0x3E - Tester present"""
-        if len(request) < 2:
-            return self._negative_response(0x3E, 0x13)
-
-        sub_function = request[1]
+        sub_function = mv[1]
 
         # Refresh session timeout
         self.session_start_time = time.time()
@@ -465,16 +494,13 @@ class UDSServiceHandler:
             return None  # Suppress response
 
     # Service 0x85: Control DTC Setting
-    def _service_85_control_dtc_setting(self, request: bytes) -> bytes:
+    def _service_85_control_dtc_setting(self, mv: memoryview, length: int) -> bytes:
         """Service 0x85 - Control DTC setting"""
-        if len(request) < 2:
-            return self._negative_response(0x85, 0x13)
-
         # Requires extended session
         if self.current_session != DiagnosticSession.EXTENDED:
             return self._negative_response(0x85, 0x7F)
 
-        control_type = request[1]
+        control_type = mv[1]
 
         # 0x01 = On, 0x02 = Off
         # In simulation, just acknowledge
@@ -8,17 +8,28 @@ time-based evolution, and drive cycle tracking for OBD-II readiness monitors.
 import time
 import math
 import random
-from enum import Enum
-from typing import Dict, Optional
+from enum import Enum, IntEnum
+from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 
+import numpy as np
 
-class EngineState(Enum):
-    """Engine operating states"""
-    OFF = "off"
-    CRANKING = "cranking"
-    RUNNING = "running"
-    STALLING = "stalling"
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; fall back to plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+class EngineState(IntEnum):
+    """Engine operating states (lowercase name is the display label)"""
+    OFF = 0
+    CRANKING = 1
+    RUNNING = 2
+    STALLING = 3
 
 
 class IgnitionState(Enum):
@@ -29,7 +40,7 @@ class IgnitionState(Enum):
     START = "start"      # Cranking position
 
 
-@dataclass
+@dataclass(slots=True)
 class SensorData:
     """Current sensor readings"""
     # Engine
@@ -73,20 +84,261 @@ class SensorData:
     mil_status: bool = False  # Check Engine Light
 
 
-@dataclass
+# Readiness monitor completion bits (DriveCycle._mask)
+MONITOR_MISFIRE = 1 << 0
+MONITOR_FUEL_SYSTEM = 1 << 1
+MONITOR_COMPONENT = 1 << 2
+MONITOR_CATALYST = 1 << 3
+MONITOR_HEATED_CATALYST = 1 << 4
+MONITOR_EVAP_SYSTEM = 1 << 5
+MONITOR_SECONDARY_AIR = 1 << 6
+MONITOR_OXYGEN_SENSOR = 1 << 7
+MONITOR_OXYGEN_SENSOR_HEATER = 1 << 8
+MONITOR_EGR_SYSTEM = 1 << 9
+ALL_MONITORS = 0x3FF
+
+# Gaussian samples generated per noise buffer refill
+NOISE_BUFFER_SIZE = 4096
+
+# Monitors completed by driving; the secondary air monitor is never run
+DRIVE_CYCLE_MONITORS = ALL_MONITORS & ~MONITOR_SECONDARY_AIR
+
+# Monitors reported as supported in Mode 01 PID 01
+PID01_SUPPORTED_MONITORS = DRIVE_CYCLE_MONITORS
+
+# Column indices of VehicleStateTable
+SIGNAL_RPM = 0
+SIGNAL_SPEED = 1
+SIGNAL_COOLANT_TEMP = 2
+SIGNAL_ENGINE_LOAD = 3
+SIGNAL_THROTTLE = 4
+SIGNAL_FUEL_LEVEL = 5
+SIGNAL_MAF = 6
+SIGNAL_BATTERY_VOLTAGE = 7
+SIGNAL_ENGINE_RUNTIME = 8
+SIGNAL_DISTANCE = 9
+SIGNAL_MIL = 10
+NUM_SIGNALS = 11
+
+
+def _monitor_flag(bit: int) -> property:
+    """Boolean view of a single readiness monitor bit"""
+    def getter(self) -> bool:
+        return bool(self._mask & bit)
+
+    def setter(self, complete: bool):
+        if complete:
+            self._mask |= bit
+        else:
+            self._mask &= ~bit
+
+    return property(getter, setter)
+
+
+def _pid01_noncontinuous(mask: int) -> int:
+    """
+    Map non-continuous MONITOR_* bits to the SAE J1979 PID 01 byte C/D layout
+
+    Bits: 0=Catalyst, 1=Heated catalyst, 2=EVAP, 3=Secondary air,
+    4=A/C refrigerant (not simulated), 5=O2 sensor, 6=O2 heater, 7=EGR
+    """
+    bits = mask >> 3  # MONITOR_CATALYST becomes bit 0
+    return (bits & 0x0F) | ((bits & 0x70) << 1)
+
+
+@njit(cache=True, nogil=True)
+def _tick_running(rpm, throttle_position, vehicle_speed, coolant_temp, fuel_level,
+                  short_term_fuel_trim, long_term_fuel_trim, catalyst_temp, engine_runtime,
+                  dt, rpm_idle, rpm_max, rpm_span, gear_ratio, target_temp, ambient_temp,
+                  inv_fuel_capacity, rpm_noise, maf_noise, coolant_noise):
+    """
+    Numeric core of the running-state update
+
+    Plain floats in, plain floats out so Numba can compile it when available.
+    The compiled kernel releases the GIL, so CAN receive threads keep running
+    while the simulation thread steps.
+    rpm_span is rpm_max - rpm_idle and inv_fuel_capacity is 100 / fuel capacity
+    (liters to percent). The *_noise arguments are pre-scaled Gaussian samples.
+
+    Returns:
+        Tuple of (rpm, engine_load, vehicle_speed, distance_km, maf, coolant_temp,
+        intake_air_temp, timing_advance, fuel_level, fuel_rate, o2_voltage,
+        short_term_fuel_trim, long_term_fuel_trim, catalyst_temp, battery_voltage,
+        engine_runtime)
+    """
+    # Update engine runtime
+    engine_runtime += dt
+
+    # Calculate target RPM based on throttle and load
+    throttle_factor = throttle_position / 100.0
+    target_rpm = rpm_idle + rpm_span * throttle_factor
+
+    # Smooth RPM changes (first-order lag)
+    rpm_tau = 0.5  # Time constant
+    rpm += (target_rpm - rpm) * (dt / rpm_tau)
+
+    # Add realistic RPM variation
+    rpm += rpm_noise
+    rpm = max(rpm_idle * 0.9, min(rpm_max, rpm))
+
+    # Calculate engine load (simplified model)
+    # Load depends on throttle, RPM, and speed
+    base_load = throttle_factor * 100
+    rpm_factor = (rpm - rpm_idle) / rpm_span
+    speed_factor = min(1.0, vehicle_speed / 120.0)
+    engine_load = base_load * (0.5 + 0.5 * rpm_factor) * (0.7 + 0.3 * speed_factor)
+    engine_load = max(0, min(100, engine_load))
+
+    # Update speed based on RPM and gear ratio
+    # Simplified: speed = RPM / gear_ratio / 60 (converts to km/h)
+    if rpm > rpm_idle:
+        target_speed = (rpm - rpm_idle) / gear_ratio / 60.0 * 10
+        vehicle_speed += (target_speed - vehicle_speed) * (dt / 1.0)
+    else:
+        # Deceleration when not throttling
+        vehicle_speed = max(0, vehicle_speed - 5 * dt)
+
+    distance_km = vehicle_speed * (dt / 3600.0)  # Convert to km
+
+    # Update MAF (Mass Air Flow) based on RPM and load
+    # Simplified: MAF ∝ RPM × Load
+    maf = (rpm / 1000.0) * (engine_load / 100.0) * 5.0
+    maf += maf_noise
+    maf = max(0, maf)
+
+    # Update coolant temperature (warmup simulation)
+    if coolant_temp < target_temp:
+        # Warmup - faster at high load
+        warmup_rate = 2.0 + (engine_load / 100.0) * 3.0
+        coolant_temp += warmup_rate * dt
+    else:
+        # Maintain operating temperature
+        temp_variation = coolant_noise
+        coolant_temp = target_temp + temp_variation
+
+    # Intake air temp follows ambient but increases with load
+    intake_temp_rise = engine_load * 0.3
+    intake_air_temp = ambient_temp + intake_temp_rise
+
+    # Update timing advance based on RPM and load
+    # Higher RPM and lower load = more advance
+    rpm_advance = (rpm / rpm_max) * 30
+    load_reduction = (100 - engine_load) * 0.1
+    timing_advance = rpm_advance + load_reduction
+
+    # Update fuel consumption
+    # Consumption increases with load and RPM
+    consumption_rate = engine_load * 0.01 + (rpm / 1000.0) * 0.05
+    fuel_consumed_liters = consumption_rate * (dt / 3600.0)
+    fuel_level -= fuel_consumed_liters * inv_fuel_capacity
+    fuel_level = max(0, fuel_level)
+    fuel_rate = consumption_rate
+
+    # Update O2 sensor (lambda oscillation around stoichiometric)
+    lambda_target = 0.45  # Stoichiometric
+    oscillation = math.sin(engine_runtime * 2) * 0.05
+    o2_voltage = lambda_target + oscillation
+
+    # Update fuel trims based on load and O2
+    # Simplified: trims compensate for lean/rich conditions
+    if o2_voltage < 0.4:  # Lean
+        short_term_fuel_trim = min(25, short_term_fuel_trim + dt * 2)
+    elif o2_voltage > 0.5:  # Rich
+        short_term_fuel_trim = max(-25, short_term_fuel_trim - dt * 2)
+
+    # Long-term trim slowly follows short-term
+    long_term_fuel_trim += (short_term_fuel_trim - long_term_fuel_trim) * dt * 0.1
+
+    # Update catalyst temperature (follows coolant temp but higher)
+    if coolant_temp > 70:
+        target_catalyst_temp = 400 + engine_load * 2
+        catalyst_temp += (target_catalyst_temp - catalyst_temp) * dt * 0.1
+
+    # Update battery voltage (drops slightly under load)
+    base_voltage = 14.2 if rpm > rpm_idle else 12.6
+    load_drop = (engine_load / 100.0) * 0.3
+    battery_voltage = base_voltage - load_drop
+
+    return (rpm, engine_load, vehicle_speed, distance_km, maf, coolant_temp,
+            intake_air_temp, timing_advance, fuel_level, fuel_rate, o2_voltage,
+            short_term_fuel_trim, long_term_fuel_trim, catalyst_temp, battery_voltage,
+            engine_runtime)
+
+
+class VehicleStateTable:
+    """
+    Structure-of-arrays snapshot of several vehicles' sensor readings
+
+    One float32 row per ECU, one column per SIGNAL_* index (MIL is stored as
+    0/1). Readers presenting values should round away float32 noise. Rows are
+    refreshed once per simulation step, so readers on other threads get a
+    consistent set of values without touching the live SensorData objects.
+    """
+
+    def __init__(self, num_vehicles: int):
+        """
+        Initialize state table
+
+        Args:
+            num_vehicles: Number of rows (one per ECU)
+        """
+        self.arr = np.zeros((num_vehicles, NUM_SIGNALS), dtype=np.float32)
+
+    def capture(self, index: int, sensors: SensorData):
+        """
+        Copy one vehicle's sensor readings into its row
+
+        Args:
+            index: Row index
+            sensors: Current sensor readings
+        """
+        self.arr[index] = (
+            sensors.rpm,
+            sensors.vehicle_speed,
+            sensors.coolant_temp,
+            sensors.engine_load,
+            sensors.throttle_position,
+            sensors.fuel_level,
+            sensors.maf,
+            sensors.battery_voltage,
+            sensors.engine_runtime,
+            sensors.distance_traveled,
+            sensors.mil_status,
+        )
+
+    def capture_all(self, vehicles: List['VehicleSimulator']):
+        """
+        Refresh every row in a single array assignment
+
+        Args:
+            vehicles: Simulators in row order
+        """
+        self.arr[:] = [
+            (s.rpm, s.vehicle_speed, s.coolant_temp, s.engine_load, s.throttle_position,
+             s.fuel_level, s.maf, s.battery_voltage, s.engine_runtime, s.distance_traveled,
+             s.mil_status)
+            for s in [vehicle.sensors for vehicle in vehicles]
+        ]
+
+    def get(self, index: int, signal: int) -> float:
+        """
+        Read one signal
+
+        Args:
+            index: Row index
+            signal: SIGNAL_* column index
+
+        Returns:
+            Signal value
+        """
+        return float(self.arr[index, signal])
+
+
+@dataclass(slots=True)
 class DriveCycle:
     """Drive cycle tracking for readiness monitors"""
-    # Readiness monitor completion flags
-    misfire_monitor_complete: bool = False
-    fuel_system_monitor_complete: bool = False
-    component_monitor_complete: bool = False
-    catalyst_monitor_complete: bool = False
-    heated_catalyst_monitor_complete: bool = False
-    evap_system_monitor_complete: bool = False
-    secondary_air_monitor_complete: bool = False
-    oxygen_sensor_monitor_complete: bool = False
-    oxygen_sensor_heater_complete: bool = False
-    egr_system_monitor_complete: bool = False
+    # Readiness monitor completion flags, one MONITOR_* bit each
+    _mask: int = 0
 
     # Drive cycle requirements tracking
     idle_time: float = 0.0
@@ -95,18 +347,20 @@ class DriveCycle:
     decel_count: int = 0
     cold_start_count: int = 0
 
+    misfire_monitor_complete = _monitor_flag(MONITOR_MISFIRE)
+    fuel_system_monitor_complete = _monitor_flag(MONITOR_FUEL_SYSTEM)
+    component_monitor_complete = _monitor_flag(MONITOR_COMPONENT)
+    catalyst_monitor_complete = _monitor_flag(MONITOR_CATALYST)
+    heated_catalyst_monitor_complete = _monitor_flag(MONITOR_HEATED_CATALYST)
+    evap_system_monitor_complete = _monitor_flag(MONITOR_EVAP_SYSTEM)
+    secondary_air_monitor_complete = _monitor_flag(MONITOR_SECONDARY_AIR)
+    oxygen_sensor_monitor_complete = _monitor_flag(MONITOR_OXYGEN_SENSOR)
+    oxygen_sensor_heater_complete = _monitor_flag(MONITOR_OXYGEN_SENSOR_HEATER)
+    egr_system_monitor_complete = _monitor_flag(MONITOR_EGR_SYSTEM)
+
     def reset(self):
         """Reset all monitors to incomplete"""
-        self.misfire_monitor_complete = False
-        self.fuel_system_monitor_complete = False
-        self.component_monitor_complete = False
-        self.catalyst_monitor_complete = False
-        self.heated_catalyst_monitor_complete = False
-        self.evap_system_monitor_complete = False
-        self.secondary_air_monitor_complete = False
-        self.oxygen_sensor_monitor_complete = False
-        self.oxygen_sensor_heater_complete = False
-        self.egr_system_monitor_complete = False
+        self._mask = 0
 
         self.idle_time = 0.0
         self.cruise_time = 0.0
@@ -116,33 +370,47 @@ class DriveCycle:
 
     def get_completion_mask(self) -> int:
         """Get readiness monitor completion as bitmask"""
-        mask = 0
-        if self.misfire_monitor_complete:
-            mask |= (1 << 0)
-        if self.fuel_system_monitor_complete:
-            mask |= (1 << 1)
-        if self.component_monitor_complete:
-            mask |= (1 << 2)
-        if self.catalyst_monitor_complete:
-            mask |= (1 << 3)
-        if self.heated_catalyst_monitor_complete:
-            mask |= (1 << 4)
-        if self.evap_system_monitor_complete:
-            mask |= (1 << 5)
-        if self.secondary_air_monitor_complete:
-            mask |= (1 << 6)
-        if self.oxygen_sensor_monitor_complete:
-            mask |= (1 << 7)
-        if self.oxygen_sensor_heater_complete:
-            mask |= (1 << 8)
-        if self.egr_system_monitor_complete:
-            mask |= (1 << 9)
-        return mask
+        return self._mask
+
+    def build_pid01_bytes(self, mil_on: bool, dtc_count: int) -> bytes:
+        """
+        Build the 4 data bytes (A-D) of a Mode 01 PID 01 response
+
+        Uses the SAE J1979 layout, where status bits are 1 = NOT complete:
+            A: bit 7 = MIL, bits 0-6 = DTC count
+            B: bits 0-2 = misfire/fuel/component supported,
+               bits 4-6 = misfire/fuel/component incomplete (bit 3 = 0, spark ignition)
+            C: non-continuous monitors supported
+            D: non-continuous monitors incomplete
+
+        Args:
+            mil_on: Malfunction indicator lamp state
+            dtc_count: Number of confirmed emission-related DTCs
+
+        Returns:
+            Bytes A, B, C, D
+        """
+        incomplete = PID01_SUPPORTED_MONITORS & ~self._mask
+        return bytes((
+            (0x80 if mil_on else 0x00) | min(127, dtc_count),
+            (PID01_SUPPORTED_MONITORS & 0x07) | ((incomplete & 0x07) << 4),
+            _pid01_noncontinuous(PID01_SUPPORTED_MONITORS),
+            _pid01_noncontinuous(incomplete),
+        ))
 
 
 class VehicleSimulator:
     """Simulates realistic vehicle behavior with sensor correlations"""
 
+    __slots__ = (
+        'config', 'ignition_state', 'engine_state', 'sensors', 'drive_cycle',
+        'last_update', 'engine_start_time', 'ambient_temp',
+        'rpm_idle', 'rpm_max', 'fuel_capacity', 'gear_ratio',
+        'prev_speed', 'prev_throttle', '_dispatch',
+        '_rng', '_noise', '_noise_idx', '_off_settled',
+        '_rpm_span', '_inv_fuel_capacity', '_coolant_target',
+    )
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize vehicle simulator
@@ -169,10 +437,31 @@ class VehicleSimulator:
         self.fuel_capacity = self.config.get('fuel_capacity', 50)  # liters
         self.gear_ratio = 3.5  # Simplified - affects speed/RPM relationship
 
+        # Derived constants used every running tick
+        self._rpm_span = self.rpm_max - self.rpm_idle
+        self._inv_fuel_capacity = 100.0 / self.fuel_capacity
+        self._coolant_target = self.config.get('coolant_temp_normal', 90)
+
         # Previous state for derivative calculations
         self.prev_speed = 0.0
         self.prev_throttle = 0.0
 
+        # Engine off and cooled to ambient; OFF ticks have nothing left to do
+        self._off_settled = False
+
+        # Sensor noise, drawn from a pre-generated buffer of standard normals.
+        # Seeded from the random module so random.seed() keeps runs reproducible.
+        self._rng = np.random.default_rng(random.getrandbits(64))
+        self._noise = self._rng.standard_normal(NOISE_BUFFER_SIZE).tolist()
+        self._noise_idx = 0
+
+        # Per-tick update handler for each engine state
+        self._dispatch = {
+            EngineState.RUNNING: self._update_running_tick,
+            EngineState.CRANKING: self._update_cranking_state,
+            EngineState.OFF: self._update_off_state,
+        }
+
     def _default_config(self) -> Dict:
         """Default vehicle configuration"""
         return {
@@ -197,199 +486,152 @@ class VehicleSimulator:
             dt = current_time - self.last_update
             self.last_update = current_time
 
+        if self._off_settled:
+            return
+
         # Update based on engine state
-        if self.engine_state == EngineState.RUNNING:
-            self._update_running_state(dt)
-            self._update_readiness_monitors(dt)
-        elif self.engine_state == EngineState.CRANKING:
-            self._update_cranking_state(dt)
-        elif self.engine_state == EngineState.OFF:
-            self._update_off_state(dt)
+        fn = self._dispatch.get(self.engine_state)
+        if fn:
+            fn(dt)
+
+    def _gauss(self, sigma: float) -> float:
+        """Next zero-mean Gaussian sample with the given standard deviation"""
+        i = self._noise_idx
+        if i >= NOISE_BUFFER_SIZE:
+            self._noise = self._rng.standard_normal(NOISE_BUFFER_SIZE).tolist()
+            i = 0
+        self._noise_idx = i + 1
+        return self._noise[i] * sigma
+
+    def _update_running_tick(self, dt: float):
+        """Update vehicle in running state, including readiness monitors"""
+        self._update_running_state(dt)
+        self._update_readiness_monitors(dt)
 
     def _update_running_state(self, dt: float):
         """Update vehicle in running state"""
-        # Update engine runtime
-        self.sensors.engine_runtime += dt
-
-        # Calculate target RPM based on throttle and load
-        throttle_factor = self.sensors.throttle_position / 100.0
-        target_rpm = self.rpm_idle + (self.rpm_max - self.rpm_idle) * throttle_factor
-
-        # Smooth RPM changes (first-order lag)
-        rpm_tau = 0.5  # Time constant
-        self.sensors.rpm += (target_rpm - self.sensors.rpm) * (dt / rpm_tau)
-
-        # Add realistic RPM variation
-        self.sensors.rpm += random.gauss(0, 10)
-        self.sensors.rpm = max(self.rpm_idle * 0.9, min(self.rpm_max, self.sensors.rpm))
-
-        # Calculate engine load (simplified model)
-        # Load depends on throttle, RPM, and speed
-        base_load = throttle_factor * 100
-        rpm_factor = (self.sensors.rpm - self.rpm_idle) / (self.rpm_max - self.rpm_idle)
-        speed_factor = min(1.0, self.sensors.vehicle_speed / 120.0)
-        self.sensors.engine_load = base_load * (0.5 + 0.5 * rpm_factor) * (0.7 + 0.3 * speed_factor)
-        self.sensors.engine_load = max(0, min(100, self.sensors.engine_load))
-
-        # Update speed based on RPM and gear ratio
-        # Simplified: speed = RPM / gear_ratio / 60 (converts to km/h)
-        if self.sensors.rpm > self.rpm_idle:
-            target_speed = (self.sensors.rpm - self.rpm_idle) / self.gear_ratio / 60.0 * 10
-            self.sensors.vehicle_speed += (target_speed - self.sensors.vehicle_speed) * (dt / 1.0)
-        else:
-            # Deceleration when not throttling
-            self.sensors.vehicle_speed = max(0, self.sensors.vehicle_speed - 5 * dt)
+        s = self.sensors
+        dc = self.drive_cycle
+
+        (s.rpm, s.engine_load, s.vehicle_speed, distance_km, s.maf, s.coolant_temp,
+         s.intake_air_temp, s.timing_advance, s.fuel_level, s.fuel_rate, s.o2_voltage,
+         s.short_term_fuel_trim, s.long_term_fuel_trim, s.catalyst_temp,
+         s.battery_voltage, s.engine_runtime) = _tick_running(
+            s.rpm, s.throttle_position, s.vehicle_speed, s.coolant_temp, s.fuel_level,
+            s.short_term_fuel_trim, s.long_term_fuel_trim, s.catalyst_temp, s.engine_runtime,
+            dt, self.rpm_idle, self.rpm_max, self._rpm_span, self.gear_ratio,
+            self._coolant_target, self.ambient_temp, self._inv_fuel_capacity,
+            self._gauss(10), self._gauss(0.1), self._gauss(0.5))
 
         # Update distance traveled
-        distance_km = self.sensors.vehicle_speed * (dt / 3600.0)  # Convert to km
-        self.sensors.distance_traveled += distance_km
-        self.sensors.distance_since_clear += distance_km
-        if self.sensors.mil_status:
-            self.sensors.distance_with_mil += distance_km
-
-        # Update MAF (Mass Air Flow) based on RPM and load
-        # Simplified: MAF ∝ RPM × Load
-        self.sensors.maf = (self.sensors.rpm / 1000.0) * (self.sensors.engine_load / 100.0) * 5.0
-        self.sensors.maf += random.gauss(0, 0.1)
-        self.sensors.maf = max(0, self.sensors.maf)
-
-        # Update coolant temperature (warmup simulation)
-        target_temp = self.config.get('coolant_temp_normal', 90)
-        if self.sensors.coolant_temp < target_temp:
-            # Warmup - faster at high load
-            warmup_rate = 2.0 + (self.sensors.engine_load / 100.0) * 3.0
-            self.sensors.coolant_temp += warmup_rate * dt
-        else:
-            # Maintain operating temperature
-            temp_variation = random.gauss(0, 0.5)
-            self.sensors.coolant_temp = target_temp + temp_variation
-
-        # Intake air temp follows ambient but increases with load
-        intake_temp_rise = self.sensors.engine_load * 0.3
-        self.sensors.intake_air_temp = self.ambient_temp + intake_temp_rise
-
-        # Update timing advance based on RPM and load
-        # Higher RPM and lower load = more advance
-        rpm_advance = (self.sensors.rpm / self.rpm_max) * 30
-        load_reduction = (100 - self.sensors.engine_load) / 100.0 * 10
-        self.sensors.timing_advance = rpm_advance + load_reduction
-
-        # Update fuel consumption
-        # Consumption increases with load and RPM
-        consumption_rate = self.sensors.engine_load * 0.01 + (self.sensors.rpm / 1000.0) * 0.05
-        fuel_consumed_liters = consumption_rate * (dt / 3600.0)
-        self.sensors.fuel_level -= (fuel_consumed_liters / self.fuel_capacity) * 100
-        self.sensors.fuel_level = max(0, self.sensors.fuel_level)
-        self.sensors.fuel_rate = consumption_rate
-
-        # Update O2 sensor (lambda oscillation around stoichiometric)
-        lambda_target = 0.45  # Stoichiometric
-        oscillation = math.sin(self.sensors.engine_runtime * 2) * 0.05
-        self.sensors.o2_voltage = lambda_target + oscillation
-
-        # Update fuel trims based on load and O2
-        # Simplified: trims compensate for lean/rich conditions
-        if self.sensors.o2_voltage < 0.4:  # Lean
-            self.sensors.short_term_fuel_trim = min(25, self.sensors.short_term_fuel_trim + dt * 2)
-        elif self.sensors.o2_voltage > 0.5:  # Rich
-            self.sensors.short_term_fuel_trim = max(-25, self.sensors.short_term_fuel_trim - dt * 2)
-
-        # Long-term trim slowly follows short-term
-        self.sensors.long_term_fuel_trim += (self.sensors.short_term_fuel_trim - self.sensors.long_term_fuel_trim) * dt * 0.1
-
-        # Update catalyst temperature (follows coolant temp but higher)
-        if self.sensors.coolant_temp > 70:
-            target_catalyst_temp = 400 + self.sensors.engine_load * 2
-            self.sensors.catalyst_temp += (target_catalyst_temp - self.sensors.catalyst_temp) * dt * 0.1
-
-        # Update battery voltage (drops slightly under load)
-        base_voltage = 14.2 if self.sensors.rpm > self.rpm_idle else 12.6
-        load_drop = (self.sensors.engine_load / 100.0) * 0.3
-        self.sensors.battery_voltage = base_voltage - load_drop
+        s.distance_traveled, s.distance_since_clear = (s.distance_traveled + distance_km,
+                                                       s.distance_since_clear + distance_km)
+        # Only accumulates while the MIL is on (bool -> 0/1)
+        s.distance_with_mil += distance_km * s.mil_status
 
         # Track acceleration/deceleration for drive cycle
-        speed_change = self.sensors.vehicle_speed - self.prev_speed
+        speed_change = s.vehicle_speed - self.prev_speed
         if speed_change > 5:  # Accelerating
-            self.drive_cycle.accel_count += 1
+            dc.accel_count += 1
         elif speed_change < -5:  # Decelerating
-            self.drive_cycle.decel_count += 1
+            dc.decel_count += 1
 
         # Track idle vs cruise time
-        if self.sensors.vehicle_speed < 5:
-            self.drive_cycle.idle_time += dt
-        elif 50 < self.sensors.vehicle_speed < 80:
-            self.drive_cycle.cruise_time += dt
+        if s.vehicle_speed < 5:
+            dc.idle_time += dt
+        elif 50 < s.vehicle_speed < 80:
+            dc.cruise_time += dt
 
         # Store previous values
-        self.prev_speed = self.sensors.vehicle_speed
-        self.prev_throttle = self.sensors.throttle_position
+        self.prev_speed = s.vehicle_speed
+        self.prev_throttle = s.throttle_position
 
     def _update_cranking_state(self, dt: float):
         """Update vehicle in cranking state"""
+        s = self.sensors
+        dc = self.drive_cycle
+
         # RPM builds up during cranking
-        self.sensors.rpm = min(400, self.sensors.rpm + 200 * dt)
+        s.rpm = min(400, s.rpm + 200 * dt)
 
         # Transition to running after brief cranking
-        if self.sensors.rpm >= 300:
+        if s.rpm >= 300:
             self.engine_state = EngineState.RUNNING
-            self.sensors.rpm = self.rpm_idle
+            s.rpm = self.rpm_idle
             self.engine_start_time = time.time()
 
             # Cold start detection
-            if self.sensors.coolant_temp < 50:
-                self.drive_cycle.cold_start_count += 1
-                self.sensors.warmups_since_clear += 1
+            if s.coolant_temp < 50:
+                dc.cold_start_count += 1
+                s.warmups_since_clear += 1
 
     def _update_off_state(self, dt: float):
         """Update vehicle in off state"""
+        s = self.sensors
+
         # Engine cools down slowly
-        if self.sensors.coolant_temp > self.ambient_temp:
+        if s.coolant_temp > self.ambient_temp:
             cooldown_rate = 0.5  # °C per second
-            self.sensors.coolant_temp = max(self.ambient_temp,
-                                           self.sensors.coolant_temp - cooldown_rate * dt)
+            s.coolant_temp = max(self.ambient_temp,
+                                 s.coolant_temp - cooldown_rate * dt)
 
         # Everything else goes to zero
-        self.sensors.rpm = 0
-        self.sensors.vehicle_speed = 0
-        self.sensors.engine_load = 0
-        self.sensors.maf = 0
-        self.sensors.fuel_rate = 0
-        self.sensors.battery_voltage = 12.6
-        self.sensors.engine_runtime = 0
+        s.rpm = 0
+        s.vehicle_speed = 0
+        s.engine_load = 0
+        s.maf = 0
+        s.fuel_rate = 0
+        s.battery_voltage = 12.6
+        s.engine_runtime = 0
+
+        # Fully cooled down - further OFF ticks would rewrite the same values
+        # (the set_* test hooks clear this so their writes are zeroed again)
+        if s.coolant_temp <= self.ambient_temp:
+            self._off_settled = True
 
     def _update_readiness_monitors(self, dt: float):
         """Update OBD-II readiness monitor completion status"""
-        # Monitors complete after specific drive cycle requirements are met
+        dc = self.drive_cycle
+        mask = dc._mask
+
+        # Nothing left to complete
+        if mask & DRIVE_CYCLE_MONITORS == DRIVE_CYCLE_MONITORS:
+            return
+
+        s = self.sensors
+
+        # Monitors complete after specific drive cycle requirements are met;
+        # already-complete monitors skip their checks
 
         # Component monitor - completes quickly
-        if self.sensors.engine_runtime > 10:
-            self.drive_cycle.component_monitor_complete = True
+        if not mask & MONITOR_COMPONENT and s.engine_runtime > 10:
+            mask |= MONITOR_COMPONENT
 
         # Fuel system monitor - needs stable operation
-        if self.sensors.engine_runtime > 30 and self.sensors.coolant_temp > 70:
-            self.drive_cycle.fuel_system_monitor_complete = True
+        if not mask & MONITOR_FUEL_SYSTEM and s.engine_runtime > 30 and s.coolant_temp > 70:
+            mask |= MONITOR_FUEL_SYSTEM
 
         # Misfire monitor - needs varied RPM
-        if self.sensors.engine_runtime > 60:
-            self.drive_cycle.misfire_monitor_complete = True
+        if not mask & MONITOR_MISFIRE and s.engine_runtime > 60:
+            mask |= MONITOR_MISFIRE
 
         # O2 sensor monitors - need operating temperature
-        if self.sensors.coolant_temp > 80 and self.sensors.engine_runtime > 45:
-            self.drive_cycle.oxygen_sensor_monitor_complete = True
-            self.drive_cycle.oxygen_sensor_heater_complete = True
+        if not mask & MONITOR_OXYGEN_SENSOR and s.coolant_temp > 80 and s.engine_runtime > 45:
+            mask |= MONITOR_OXYGEN_SENSOR | MONITOR_OXYGEN_SENSOR_HEATER
 
         # Catalyst monitor - needs prolonged operation at temp
-        if self.sensors.catalyst_temp > 400 and self.drive_cycle.cruise_time > 120:
-            self.drive_cycle.catalyst_monitor_complete = True
-            self.drive_cycle.heated_catalyst_monitor_complete = True
+        if not mask & MONITOR_CATALYST and s.catalyst_temp > 400 and dc.cruise_time > 120:
+            mask |= MONITOR_CATALYST | MONITOR_HEATED_CATALYST
 
         # EVAP monitor - needs specific drive pattern
-        if self.drive_cycle.cruise_time > 60 and self.drive_cycle.idle_time > 30:
-            self.drive_cycle.evap_system_monitor_complete = True
+        if not mask & MONITOR_EVAP_SYSTEM and dc.cruise_time > 60 and dc.idle_time > 30:
+            mask |= MONITOR_EVAP_SYSTEM
 
         # EGR monitor - needs highway driving
-        if self.drive_cycle.cruise_time > 180:
-            self.drive_cycle.egr_system_monitor_complete = True
+        if not mask & MONITOR_EGR_SYSTEM and dc.cruise_time > 180:
+            mask |= MONITOR_EGR_SYSTEM
+
+        dc._mask = mask
 
     # Control methods
 
@@ -425,6 +667,7 @@ class VehicleSimulator:
             if self.engine_state == EngineState.OFF:
                 self.engine_state = EngineState.CRANKING
                 self.sensors.rpm = 100
+                self._off_settled = False
             print(f"[Vehicle] Ignition: START - Cranking engine")
 
     def start_engine(self):
@@ -444,6 +687,7 @@ class VehicleSimulator:
         if self.engine_state == EngineState.OFF:
             self.engine_state = EngineState.CRANKING
             self.sensors.rpm = 100
+            self._off_settled = False
             print("[Vehicle] Engine starting...")
             return True
         return False
@@ -472,10 +716,12 @@ class VehicleSimulator:
     def set_throttle(self, position: float):
         """Set throttle position (0-100%)"""
         self.sensors.throttle_position = max(0, min(100, position))
+        self._off_settled = False
 
     def set_speed(self, speed: float):
         """Directly set vehicle speed (for testing)"""
         self.sensors.vehicle_speed = max(0, speed)
+        self._off_settled = False
         # Adjust RPM accordingly
         if speed > 0 and self.engine_state == EngineState.RUNNING:
             self.sensors.rpm = self.rpm_idle + speed * self.gear_ratio * 6
@@ -483,6 +729,7 @@ class VehicleSimulator:
     def set_rpm(self, rpm: float):
         """Directly set engine RPM (for testing)"""
         self.sensors.rpm = max(0, min(self.rpm_max, rpm))
+        self._off_settled = False
 
     def get_sensor_data(self) -> SensorData:
         """Get current sensor readings"""
@@ -6,11 +6,40 @@ Simulates an ECU responding to OBD-II and UDS requests over CAN
 
 import can
 import time
-from threading import Thread
+import argparse
+import logging
 import struct
+from typing import Optional
+
+from lib.can_bus import enlarge_rcvbuf
+
+logger = logging.getLogger(__name__)
+
+_pack_u16 = struct.Struct('>H').pack
+# ISO-TP single frame: PCI byte + payload zero-padded to 7 bytes
+_pack_frame = struct.Struct('>B7s').pack
+
+# Static identification data
+_VIN = b"1HGBH41JXMN109186"
+_PART_NUMBER = b"12345678"
+
+# Precomputed identification responses (simplified - first frame only)
+_VIN_INFO_RESP = b'\x49\x02\x01' + _VIN[:4]
+_VIN_F190_RESP = b'\x62\xf1\x90' + _VIN[:4]
+_PART_NUMBER_F187_RESP = b'\x62\xf1\x87' + _PART_NUMBER[:4]
+
 
 class MockECU:
-    def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8):
+    # Static response headers (positive response SID + PID/DID)
+    _HDR_SUPPORTED = b'\x41\x00'
+    _HDR_ENGINE_LOAD = b'\x41\x04'
+    _HDR_COOLANT_TEMP = b'\x41\x05'
+    _HDR_RPM = b'\x41\x0c'
+    _HDR_SPEED = b'\x41\x0d'
+    _HDR_THROTTLE = b'\x41\x11'
+    _HDR_FUEL_LEVEL = b'\x41\x2f'
+
+    def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8, debug=False):
         """
         Initialize Mock ECU
 
@@ -18,11 +47,16 @@ class MockECU:
             can_interface: CAN interface name (e.g., 'vcan0')
             request_id: CAN ID to listen for requests (default: 0x7E0)
             response_id: CAN ID to send responses (default: 0x7E8)
+            debug: Log every sent frame at DEBUG level
         """
         self.bus = can.interface.Bus(channel=can_interface, interface='socketcan')
+        enlarge_rcvbuf(self.bus)
         self.request_id = request_id
         self.response_id = response_id
-        self.running = False
+        self.debug = debug
+
+        # Receive notifier, created by start()
+        self._notifier: Optional[can.Notifier] = None
 
         # Simulated vehicle data
         self.vehicle_data = {
@@ -34,30 +68,46 @@ class MockECU:
             'engine_load': 25,  # %
         }
 
+        # Per-PID/DID response builders
+        self._mode01 = {
+            0x00: self._pid_supported,
+            0x04: self._pid_engine_load,
+            0x05: self._pid_coolant_temp,
+            0x0C: self._pid_rpm,
+            0x0D: self._pid_speed,
+            0x11: self._pid_throttle,
+            0x2F: self._pid_fuel_level,
+        }
+        self._mode09 = {
+            0x02: self._info_vin,
+        }
+        self._dids = {
+            0xF190: self._did_vin,
+            0xF187: self._did_part_number,
+        }
+
         print(f"Mock ECU initialized")
         print(f"  Listening on CAN ID: 0x{request_id:03X}")
         print(f"  Responding on CAN ID: 0x{response_id:03X}")
 
     def start(self):
         """Start the ECU server"""
-        self.running = True
-        self.thread = Thread(target=self._run)
-        self.thread.daemon = True
-        self.thread.start()
+        # Notifier blocks in the kernel until a frame arrives and calls _on_msg
+        self._notifier = can.Notifier(self.bus, [self._on_msg])
         print("Mock ECU started")
 
     def stop(self):
         """Stop the ECU server"""
-        self.running = False
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
         self.bus.shutdown()
         print("Mock ECU stopped")
 
-    def _run(self):
-        """Main loop to handle incoming requests"""
-        while self.running:
-            msg = self.bus.recv(timeout=0.1)
-            if msg and msg.arbitration_id == self.request_id:
-                self._handle_request(msg)
+    def _on_msg(self, msg):
+        """Notifier callback for each received CAN frame"""
+        if msg.arbitration_id == self.request_id:
+            self._handle_request(msg)
 
     def _handle_request(self, msg):
         """Handle incoming CAN request"""
@@ -124,69 +174,71 @@ class MockECU:
 
     def _handle_mode_01(self, pid):
         """Handle OBD Mode 01 PIDs (current data)"""
-        # PID 0x00: Supported PIDs
-        if pid == 0x00:
-            return bytes([0x41, 0x00, 0xBF, 0xBF, 0xA8, 0x91])
-
-        # PID 0x0C: Engine RPM
-        elif pid == 0x0C:
-            rpm_value = int(self.vehicle_data['engine_rpm'] * 4)
-            return bytes([0x41, 0x0C, (rpm_value >> 8) & 0xFF, rpm_value & 0xFF])
-
-        # PID 0x0D: Vehicle speed
-        elif pid == 0x0D:
-            speed = int(self.vehicle_data['vehicle_speed'])
-            return bytes([0x41, 0x0D, speed])
-
-        # PID 0x05: Coolant temperature
-        elif pid == 0x05:
-            temp = int(self.vehicle_data['coolant_temp'] + 40)
-            return bytes([0x41, 0x05, temp])
-
-        # PID 0x11: Throttle position
-        elif pid == 0x11:
-            throttle = int(self.vehicle_data['throttle_position'] * 255 / 100)
-            return bytes([0x41, 0x11, throttle])
-
-        # PID 0x2F: Fuel level
-        elif pid == 0x2F:
-            fuel = int(self.vehicle_data['fuel_level'] * 255 / 100)
-            return bytes([0x41, 0x2F, fuel])
-
-        # PID 0x04: Engine load
-        elif pid == 0x04:
-            load = int(self.vehicle_data['engine_load'] * 255 / 100)
-            return bytes([0x41, 0x04, load])
-
-        # Unsupported PID
-        else:
-            return bytes([0x7F, 0x01, 0x12])  # Sub-function not supported
+        handler = self._mode01.get(pid)
+        if handler:
+            return handler()
+        return bytes([0x7F, 0x01, 0x12])  # Sub-function not supported
+
+    def _pid_supported(self):
+        """PID 0x00: Supported PIDs"""
+        return self._HDR_SUPPORTED + b'\xbf\xbf\xa8\x91'
+
+    def _pid_rpm(self):
+        """PID 0x0C: Engine RPM"""
+        rpm_value = int(self.vehicle_data['engine_rpm'] * 4)
+        return self._HDR_RPM + _pack_u16(rpm_value & 0xFFFF)
+
+    def _pid_speed(self):
+        """PID 0x0D: Vehicle speed"""
+        speed = int(self.vehicle_data['vehicle_speed'])
+        return self._HDR_SPEED + bytes((speed,))
+
+    def _pid_coolant_temp(self):
+        """PID 0x05: Coolant temperature"""
+        temp = int(self.vehicle_data['coolant_temp'] + 40)
+        return self._HDR_COOLANT_TEMP + bytes((temp,))
+
+    def _pid_throttle(self):
+        """PID 0x11: Throttle position"""
+        throttle = int(self.vehicle_data['throttle_position'] * 255 / 100)
+        return self._HDR_THROTTLE + bytes((throttle,))
+
+    def _pid_fuel_level(self):
+        """PID 0x2F: Fuel level"""
+        fuel = int(self.vehicle_data['fuel_level'] * 255 / 100)
+        return self._HDR_FUEL_LEVEL + bytes((fuel,))
+
+    def _pid_engine_load(self):
+        """PID 0x04: Engine load"""
+        load = int(self.vehicle_data['engine_load'] * 255 / 100)
+        return self._HDR_ENGINE_LOAD + bytes((load,))
 
     def _handle_mode_09(self, pid):
         """Handle OBD Mode 09 PIDs (vehicle information)"""
-        # PID 0x02: VIN
-        if pid == 0x02:
-            vin = b"1HGBH41JXMN109186"
-            # Multi-frame response (simplified - just return first frame)
-            return bytes([0x49, 0x02, 0x01] + list(vin[:4]))
+        handler = self._mode09.get(pid)
+        if handler:
+            return handler()
+        return bytes([0x7F, 0x09, 0x12])
 
-        else:
-            return bytes([0x7F, 0x09, 0x12])
+    def _info_vin(self):
+        """PID 0x02: VIN"""
+        # Multi-frame response (simplified - just return first frame)
+        return _VIN_INFO_RESP
 
     def _handle_read_did(self, did):
         """Handle UDS Read Data By Identifier"""
-        # DID 0xF190: VIN
-        if did == 0xF190:
-            vin = b"1HGBH41JXMN109186"
-            return bytes([0x62, 0xF1, 0x90] + list(vin[:4]))
+        handler = self._dids.get(did)
+        if handler:
+            return handler()
+        return bytes([0x7F, 0x22, 0x31])  # Request out of range
 
-        # DID 0xF187: Part number
-        elif did == 0xF187:
-            part_num = b"12345678"
-            return bytes([0x62, 0xF1, 0x87] + list(part_num[:4]))
+    def _did_vin(self):
+        """DID 0xF190: VIN"""
+        return _VIN_F190_RESP
 
-        else:
-            return bytes([0x7F, 0x22, 0x31])  # Request out of range
+    def _did_part_number(self):
+        """DID 0xF187: Part number"""
+        return _PART_NUMBER_F187_RESP
 
     def _send_response(self, response_data):
         """Send response on CAN bus"""
@@ -195,7 +247,7 @@ class MockECU:
 
         if length <= 7:  # Single frame
             pci = 0x00 | length
-            data = bytes([pci]) + response_data + bytes([0x00] * (7 - length))
+            data = _pack_frame(pci, response_data)
 
             msg = can.Message(
                 arbitration_id=self.response_id,
@@ -204,7 +256,8 @@ class MockECU:
             )
 
             self.bus.send(msg)
-            print(f"Sent response: {data.hex()}")
+            if self.debug:
+                logger.debug("Sent response: %s", data.hex())
 
     def update_vehicle_data(self, **kwargs):
         """Update simulated vehicle data"""
@@ -213,12 +266,19 @@ class MockECU:
 
 def main():
     """Main function to run the mock ECU"""
+    parser = argparse.ArgumentParser(description='Mock OBD/UDS ECU Server')
+    parser.add_argument('--debug', action='store_true', help='Log every sent response')
+    args = parser.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+
     print("=" * 60)
     print("Mock OBD/UDS ECU Server")
     print("=" * 60)
 
     # Create and start mock ECU
-    ecu = MockECU(can_interface='vcan0')
+    ecu = MockECU(can_interface='vcan0', debug=args.debug)
     ecu.start()
 
     print("\nSimulating vehicle data changes...")
@@ -13,15 +13,22 @@ Production-grade ECU simulation with:
 """
 
 import can
-import time
 import threading
-from typing import Optional
+import asyncio
+import socket
+import struct
+from typing import Callable, Dict, List, Optional
 import argparse
 import os
+import sys
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 # Import library modules
+from lib.can_bus import enlarge_rcvbuf
 from lib.isotp import ISOTPHandler, ISOTPConfig
-from lib.vehicle_simulator import VehicleSimulator, EngineState
+from lib.vehicle_simulator import VehicleSimulator, VehicleStateTable, EngineState
 from lib.dtc_manager import DTCManager
 from lib.obd_services import OBDServiceHandler
 from lib.uds_services import UDSServiceHandler
@@ -29,12 +36,210 @@ from lib.multi_ecu import MultiECUCoordinator, ENGINE_ECU, TRANSMISSION_ECU, ABS
 from lib.config import VehicleConfig
 from control_api import ControlAPI
 
+logger = logging.getLogger(__name__)
+
+# struct can_frame / canfd_frame header: can_id, payload length, 3 pad bytes
+_CAN_FRAME_HEADER = struct.Struct('=IB3x')
+CAN_FRAME_DATA_OFFSET = 8
+CANFD_MTU = 72
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+
+# Negative response "service not supported" (NRC 0x11) for every service ID
+_NRC_SERVICE_NOT_SUPPORTED = tuple(bytes((0x7F, sid, 0x11)) for sid in range(256))
+
+# Response bytes shown in debug logs, and the marker for longer responses
+_LOG_PREVIEW_BYTES = 20
+_LOG_TRUNCATED = '...'
+
+# Control API endpoint listing, written in one call at startup
+_API_BANNER = (
+    f"\n{'=' * 60}\n"
+    "Control API Endpoints:\n"
+    "  GET  /api/health                - Health check\n"
+    "  GET  /api/ecu/info              - ECU information\n"
+    "  POST /api/dtc/inject            - Inject DTC\n"
+    "  POST /api/dtc/clear             - Clear DTCs\n"
+    "  GET  /api/dtc/list              - List DTCs\n"
+    "  GET  /api/vehicle/state         - Get vehicle state\n"
+    "  POST /api/vehicle/set           - Set vehicle state\n"
+    "  POST /api/vehicle/engine/start  - Start engine\n"
+    "  POST /api/vehicle/engine/stop   - Stop engine\n"
+    "  GET  /api/readiness/status      - Readiness monitors\n"
+    "  POST /api/readiness/reset       - Reset monitors\n"
+    f"{'=' * 60}\n\n"
+)
+
+def _request_filters(request_ids) -> list:
+    """Kernel CAN_RAW filters accepting only the given 11-bit request IDs"""
+    return [{'can_id': request_id, 'can_mask': 0x7FF, 'extended': False}
+            for request_id in request_ids]
+
+
+class ECUEventLoop:
+    """
+    Single asyncio event loop serving CAN requests and vehicle simulation
+
+    The bus socket is registered with loop.add_reader() and the simulation is
+    stepped by loop.call_at() on a fixed 10 Hz schedule, so receiving and
+    simulating share one thread and never contend with each other.
+    """
+
+    SIMULATION_STEP = 0.1  # seconds (10 Hz)
+
+    def __init__(self, bus: can.BusABC, handlers: Dict[int, Callable[[can.Message], None]],
+                 vehicles: List[VehicleSimulator], state_table: Optional[VehicleStateTable] = None):
+        """
+        Initialize event loop
+
+        Args:
+            bus: CAN bus to read from
+            handlers: Map of request CAN ID to frame handler
+            vehicles: Vehicle simulators to update each step
+            state_table: Table refreshed with each vehicle's readings after every step
+        """
+        self.bus = bus
+        self.handlers = handlers
+        self.vehicles = vehicles
+        self.state_table = state_table
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+
+        # Set by stop(); the drain checks it between frames
+        self.stop_event = threading.Event()
+
+        # Preallocated receive buffer for raw socketcan reads
+        self._buf = bytearray(CANFD_MTU)
+        self._view = memoryview(self._buf)
+
+    def start(self):
+        """Start the loop in a background thread"""
+        self.stop_event.clear()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the loop and wait for its thread to exit
+
+        Returns only after the thread has finished, so the caller can shut
+        the bus down without racing an in-flight receive.
+        """
+        if self.stop_event.is_set() or not self.thread:
+            return
+        self.stop_event.set()
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def _run(self):
+        """Thread body: register the CAN reader and simulation tick, then run"""
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+
+        sock = getattr(self.bus, 'socket', None)
+        notifier = None
+        if isinstance(sock, socket.socket):
+            loop.add_reader(sock.fileno(), self._on_readable, sock)
+        else:
+            # Buses without a raw socket are read through python-can
+            notifier = can.Notifier(self.bus, [self._dispatch], loop=loop)
+
+        deadline = loop.time() + self.SIMULATION_STEP
+        loop.call_at(deadline, self._tick, deadline)
+
+        try:
+            loop.run_forever()
+        finally:
+            if notifier:
+                notifier.stop()
+            elif sock.fileno() >= 0:
+                loop.remove_reader(sock.fileno())
+            loop.close()
+
+    def _on_readable(self, sock: socket.socket):
+        """
+        Drain every queued frame from the socketcan fd
+
+        Reads with non-blocking recv_into() into one preallocated buffer and
+        dispatches each frame by arbitration ID.
+
+        Args:
+            sock: Raw CAN socket of the bus
+        """
+        # Bind everything used per frame to locals before draining
+        buf = self._buf
+        view = self._view
+        get_handler = self.handlers.get
+        recv_into = sock.recv_into
+        unpack_header = _CAN_FRAME_HEADER.unpack_from
+        message = can.Message
+        stopping = self.stop_event.is_set
+
+        while not stopping():
+            try:
+                nbytes = recv_into(buf, CANFD_MTU, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # Socket closed underneath us
+                logger.error("[ECU] CAN receive error: %s", e)
+                self.loop.remove_reader(sock.fileno())
+                return
+
+            can_id, length = unpack_header(buf)
+            if can_id & (CAN_ERR_FLAG | CAN_RTR_FLAG):
+                continue
+
+            handler = get_handler(can_id & CAN_EFF_MASK)
+            if handler:
+                handler(message(
+                    arbitration_id=can_id & CAN_EFF_MASK,
+                    is_extended_id=bool(can_id & CAN_EFF_FLAG),
+                    is_fd=nbytes == CANFD_MTU,
+                    data=view[CAN_FRAME_DATA_OFFSET:CAN_FRAME_DATA_OFFSET + length].tobytes()
+                ))
+
+    def _dispatch(self, msg: can.Message):
+        """Notifier callback for buses without a raw socket"""
+        handler = self.handlers.get(msg.arbitration_id)
+        if handler:
+            # The notifier may call from its own thread; handlers run on the loop
+            self.loop.call_soon_threadsafe(handler, msg)
+
+    def _tick(self, deadline: float):
+        """
+        Advance every vehicle by one fixed step and schedule the next tick
+
+        Deadlines advance by a fixed step so the rate does not drift with
+        update duration.
+
+        Args:
+            deadline: Loop time this tick was scheduled for
+        """
+        step = self.SIMULATION_STEP
+        vehicles = self.vehicles
+        for vehicle in vehicles:
+            vehicle.update(step)
+
+        # One batched write of all ECUs' readings
+        if self.state_table is not None:
+            self.state_table.capture_all(vehicles)
+
+        deadline += step
+        self.loop.call_at(deadline, self._tick, deadline)
+
 
 class MockECU:
     """Advanced Mock ECU with full OBD-II/UDS support"""
 
     def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8,
-                 config_file: Optional[str] = None):
+                 config_file: Optional[str] = None, bus: Optional[can.BusABC] = None,
+                 config: Optional[VehicleConfig] = None):
         """
         Initialize Mock ECU
 
@@ -43,32 +248,60 @@ class MockECU:
             request_id: CAN ID to listen for requests
             response_id: CAN ID to send responses
             config_file: Vehicle configuration file
+            bus: Shared CAN bus; the caller then drives receiving and simulation
+                 (default: open a bus and run our own event loop)
+            config: Already loaded configuration; config_file is ignored when given
         """
-        # Load configuration
-        self.config = VehicleConfig(config_file)
-
-        # CAN bus
-        self.bus = can.Bus(interface='socketcan', channel=can_interface)
+        # Load configuration (or reuse the caller's)
+        self.config = config if config is not None else VehicleConfig(config_file)
+
+        # CAN bus; the kernel drops every frame not addressed to this ECU
+        self._owns_bus = bus is None
+        if bus is None:
+            bus = can.Bus(
+                interface='socketcan',
+                channel=can_interface,
+                can_filters=_request_filters([request_id])
+            )
+            enlarge_rcvbuf(bus)
+        self.bus = bus
         self.request_id = request_id
         self.response_id = response_id
 
         # ISO-TP handler for multi-frame support
         self.isotp = ISOTPHandler(self.bus, response_id, request_id, ISOTPConfig())
 
+        # Pre-resolved ISO-TP entry points for the per-frame path; bound to the
+        # receiver/sender directly to skip ISOTPHandler's delegating wrappers
+        self._isotp_recv = self.isotp.receiver.receive_frame
+        self._isotp_send = self.isotp.sender.send
+        self._isotp_send_nowait = self.isotp.sender.send_nowait
+        self._isotp_flow_control = self.isotp.sender.on_flow_control
+
+        # One configuration dict shared by every component
+        cfg = self.config.get_all()
+
         # Vehicle simulator
-        self.vehicle = VehicleSimulator(self.config.get_all())
+        self.vehicle = VehicleSimulator(cfg)
 
         # DTC manager
-        self.dtc_manager = DTCManager(self.config.get_all())
+        self.dtc_manager = DTCManager(cfg)
 
         # Service handlers
-        self.obd_handler = OBDServiceHandler(self.vehicle, self.dtc_manager, self.config.get_all())
-        self.uds_handler = UDSServiceHandler(self.vehicle, self.dtc_manager, self.config.get_all())
+        self.obd_handler = OBDServiceHandler(self.vehicle, self.dtc_manager, cfg)
+        self.uds_handler = UDSServiceHandler(self.vehicle, self.dtc_manager, cfg)
+
+        # Service ID -> handler for every possible first byte
+        # OBD-II services: 0x01 - 0x0A; UDS services: 0x10 and above (0x85, etc.)
+        self._dispatch: List[Callable[[bytes], Optional[bytes]]] = [self._unsupported] * 256
+        for service in range(0x01, 0x0B):
+            self._dispatch[service] = self.obd_handler.process
+        for service in range(0x10, 0x100):
+            self._dispatch[service] = self.uds_handler.process
 
         # State
         self.running = False
-        self.thread: Optional[threading.Thread] = None
-        self.simulation_thread: Optional[threading.Thread] = None
+        self.event_loop: Optional[ECUEventLoop] = None
 
         print(f"Mock ECU initialized")
         print(f"  Vehicle: {self.config.get_make()} {self.config.get_model()} {self.config.get_year()}")
@@ -80,15 +313,11 @@ class MockECU:
         """Start the ECU server"""
         self.running = True
 
-        # Start CAN message handler thread
-        self.thread = threading.Thread(target=self._run)
-        self.thread.daemon = True
-        self.thread.start()
-
-        # Start vehicle simulation thread
-        self.simulation_thread = threading.Thread(target=self._simulation_loop)
-        self.simulation_thread.daemon = True
-        self.simulation_thread.start()
+        if self._owns_bus:
+            # Serve CAN requests and run the simulation on our own event loop
+            self.event_loop = ECUEventLoop(self.bus, {self.request_id: self._handle_request},
+                                           [self.vehicle])
+            self.event_loop.start()
 
         # Start engine
         self.vehicle.start_engine()
@@ -98,37 +327,23 @@ class MockECU:
     def stop(self):
         """Stop the ECU server"""
         self.running = False
+        if self.event_loop:
+            self.event_loop.stop()
         self.vehicle.stop_engine()
-        self.bus.shutdown()
+        if self._owns_bus:
+            self.bus.shutdown()
         print("Mock ECU stopped")
 
-    def _run(self):
-        """Main loop to handle incoming CAN requests"""
-        while self.running:
-            msg = self.bus.recv(timeout=0.1)
-
-            if msg and msg.arbitration_id == self.request_id:
-                self._handle_request(msg)
-
-    def _simulation_loop(self):
-        """Background loop for vehicle simulation updates"""
-        last_update = time.time()
-
-        while self.running:
-            current_time = time.time()
-            dt = current_time - last_update
-
-            # Update vehicle simulation
-            if dt >= 0.1:  # 10 Hz update rate
-                self.vehicle.update(dt)
-                last_update = current_time
-
-            time.sleep(0.05)
-
     def _handle_request(self, msg: can.Message):
         """Handle incoming CAN request"""
+        # Flow control for a multi-frame response in progress
+        data = msg.data
+        if data and data[0] & 0xF0 == 0x30:
+            self._isotp_flow_control(data)
+            return
+
         # Use ISO-TP to receive (handles multi-frame)
-        payload = self.isotp.receive_frame(msg)
+        payload = self._isotp_recv(msg)
 
         if payload is None:
             # Waiting for more frames in multi-frame message
@@ -142,7 +357,7 @@ class MockECU:
                 self._send_response(response)
 
         except Exception as e:
-            print(f"[ECU] Error processing request: {e}")
+            logger.error("[ECU] Error processing request: %s", e)
 
     def _process_service(self, payload: bytes) -> Optional[bytes]:
         """
@@ -154,22 +369,13 @@ class MockECU:
         Returns:
             Response bytes or None
         """
-        if len(payload) < 1:
+        if not payload:
             return None
+        return self._dispatch[payload[0]](payload)
 
-        service = payload[0]
-
-        # OBD-II services: 0x01 - 0x0A
-        if 0x01 <= service <= 0x0A:
-            return self.obd_handler.process(payload)
-
-        # UDS services: 0x10 - 0x3E, 0x85, etc.
-        elif service >= 0x10:
-            return self.uds_handler.process(payload)
-
-        else:
-            # Unknown service
-            return bytes([0x7F, service, 0x11])  # Service not supported
+    def _unsupported(self, payload: bytes) -> bytes:
+        """Negative response for a service ID outside the OBD-II and UDS ranges"""
+        return _NRC_SERVICE_NOT_SUPPORTED[payload[0]]
 
     def _send_response(self, response_data: bytes):
         """
@@ -178,12 +384,26 @@ class MockECU:
         Args:
             response_data: Response payload bytes
         """
+        # On the event loop, flow control arrives through _handle_request and
+        # the rest of a multi-frame response is sent from loop callbacks;
+        # callers without a loop fall back to the blocking send
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
         try:
-            success = self.isotp.sender.send(response_data)
-            if success:
-                print(f"[ECU] Sent response: {response_data[:20].hex()}{'...' if len(response_data) > 20 else ''}")
+            if loop is not None:
+                success = self._isotp_send_nowait(response_data, loop)
+            else:
+                success = self._isotp_send(response_data)
+            if success and logger.isEnabledFor(logging.DEBUG):
+                # memoryview slice: hex() reads the payload without copying it
+                logger.debug("[ECU] Sent response: %s%s",
+                             memoryview(response_data)[:_LOG_PREVIEW_BYTES].hex(),
+                             _LOG_TRUNCATED if len(response_data) > _LOG_PREVIEW_BYTES else '')
         except Exception as e:
-            print(f"[ECU] Error sending response: {e}")
+            logger.error("[ECU] Error sending response: %s", e)
 
 
 class MockOBDSystem:
@@ -193,6 +413,8 @@ class MockOBDSystem:
         """
         Initialize Mock OBD-II system
 
+        All ECUs share one CAN bus and one event loop thread.
+
         Args:
             can_interface: CAN interface name
             enable_api: Enable HTTP Control API
@@ -201,29 +423,59 @@ class MockOBDSystem:
         self.can_interface = can_interface
         self.enable_api = enable_api
 
+        # Shared CAN bus, filtered in the kernel to the ECUs' request IDs
+        ecu_defs = (ENGINE_ECU, TRANSMISSION_ECU, ABS_ECU)
+        self.bus = can.Bus(
+            interface='socketcan',
+            channel=can_interface,
+            can_filters=_request_filters(ecu_def.request_id for ecu_def in ecu_defs)
+        )
+        enlarge_rcvbuf(self.bus)
+
         # Multi-ECU coordinator
         self.coordinator = MultiECUCoordinator()
 
+        # Vehicle profile parsed once and shared (read-only) by every ECU
+        shared_config = VehicleConfig('default.json')
+
         # Create ECUs
         self.engine_ecu = MockECU(
             can_interface=can_interface,
             request_id=ENGINE_ECU.request_id,
             response_id=ENGINE_ECU.response_id,
-            config_file='default.json'
+            bus=self.bus,
+            config=shared_config
         )
 
         self.transmission_ecu = MockECU(
             can_interface=can_interface,
             request_id=TRANSMISSION_ECU.request_id,
             response_id=TRANSMISSION_ECU.response_id,
-            config_file='default.json'
+            bus=self.bus,
+            config=shared_config
         )
 
         self.abs_ecu = MockECU(
             can_interface=can_interface,
             request_id=ABS_ECU.request_id,
             response_id=ABS_ECU.response_id,
-            config_file='default.json'
+            bus=self.bus,
+            config=shared_config
+        )
+
+        self.ecus = [self.engine_ecu, self.transmission_ecu, self.abs_ecu]
+
+        # Per-step sensor snapshot of all ECUs, one row per ECU in
+        # self.ecus (= coordinator registration) order
+        self.coordinator.state_table = VehicleStateTable(len(self.ecus))
+
+        # One event loop routes frames to the ECUs by request ID and
+        # updates every ECU's vehicle
+        self.event_loop = ECUEventLoop(
+            self.bus,
+            {ecu.request_id: ecu._handle_request for ecu in self.ecus},
+            [ecu.vehicle for ecu in self.ecus],
+            self.coordinator.state_table
         )
 
         # Register ECUs
@@ -243,41 +495,55 @@ class MockOBDSystem:
     def start(self):
         """Start all ECUs and API"""
         print("\nStarting ECUs...")
-        self.engine_ecu.start()
-        self.transmission_ecu.start()
-        self.abs_ecu.start()
+        for ecu in self.ecus:
+            ecu.start()
+        self.event_loop.start()
 
         if self.api:
             print("\nStarting Control API...")
             self.api.start()
-            print(f"\n{'=' * 60}")
-            print("Control API Endpoints:")
-            print("  GET  /api/health                - Health check")
-            print("  GET  /api/ecu/info              - ECU information")
-            print("  POST /api/dtc/inject            - Inject DTC")
-            print("  POST /api/dtc/clear             - Clear DTCs")
-            print("  GET  /api/dtc/list              - List DTCs")
-            print("  GET  /api/vehicle/state         - Get vehicle state")
-            print("  POST /api/vehicle/set           - Set vehicle state")
-            print("  POST /api/vehicle/engine/start  - Start engine")
-            print("  POST /api/vehicle/engine/stop   - Stop engine")
-            print("  GET  /api/readiness/status      - Readiness monitors")
-            print("  POST /api/readiness/reset       - Reset monitors")
-            print(f"{'=' * 60}\n")
+            sys.stdout.write(_API_BANNER)
+            sys.stdout.flush()
 
         print("System ready. Press Ctrl+C to stop.\n")
 
     def stop(self):
         """Stop all ECUs and API"""
         print("\nShutting down...")
-        self.engine_ecu.stop()
-        self.transmission_ecu.stop()
-        self.abs_ecu.stop()
+        self.event_loop.stop()
+        for ecu in self.ecus:
+            ecu.stop()
+        self.bus.shutdown()
 
         if self.api:
             self.api.stop()
 
 
+def start_log_listener(level: int = logging.INFO) -> QueueListener:
+    """
+    Route log records through a queue to a background writer thread
+
+    CAN threads then only enqueue records and never block on stdout.
+
+    Args:
+        level: Root logger level
+
+    Returns:
+        Started listener (call stop() to flush on shutdown)
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Mock OBD-II/UDS ECU System')
@@ -285,11 +551,18 @@ def main():
     parser.add_argument('--no-api', action='store_true', help='Disable Control API')
     parser.add_argument('--api-port', type=int, default=5001, help='API port (default: 5001)')
     parser.add_argument('--single-ecu', action='store_true', help='Run single ECU only (no multi-ECU)')
+    parser.add_argument('--debug', action='store_true', help='Log every sent response')
     args = parser.parse_args()
 
+    log_listener = start_log_listener()
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+
     # Allow port to be overridden by environment variable
     api_port = int(os.environ.get('CONTROL_API_PORT', args.api_port))
 
+    ecu: Optional[MockECU] = None
+    system: Optional[MockOBDSystem] = None
     try:
         if args.single_ecu:
             # Single ECU mode (original behavior)
@@ -297,9 +570,8 @@ def main():
             ecu = MockECU(can_interface=args.interface)
             ecu.start()
 
-            # Simple simulation loop
-            while True:
-                time.sleep(1)
+            # Serve until interrupted
+            threading.Event().wait()
 
         else:
             # Multi-ECU system with API
@@ -310,9 +582,8 @@ def main():
             )
             system.start()
 
-            # Keep running
-            while True:
-                time.sleep(1)
+            # Serve until interrupted
+            threading.Event().wait()
 
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
@@ -323,10 +594,12 @@ def main():
         traceback.print_exc()
 
     finally:
-        if not args.single_ecu:
+        # Joins the event loop thread before the bus is shut down
+        if system:
             system.stop()
-        else:
+        if ecu:
             ecu.stop()
+        log_listener.stop()
 
 
 if __name__ == '__main__':
@@ -7,6 +7,12 @@ Tests the mock ECU by sending various OBD-II and UDS requests
 import can
 import time
 
+from lib.can_bus import enlarge_rcvbuf
+
+# Zero padding for unused single-frame bytes
+_PADDING = bytes(7)
+
+
 class OBDClient:
     def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8):
         """
@@ -17,22 +23,34 @@ class OBDClient:
             request_id: CAN ID to send requests
             response_id: CAN ID to receive responses
         """
-        self.bus = can.interface.Bus(channel=can_interface, interface='socketcan')
+        # Kernel filter: only the ECU's responses wake recv()
+        self.bus = can.interface.Bus(
+            channel=can_interface,
+            interface='socketcan',
+            can_filters=[{'can_id': response_id, 'can_mask': 0x7FF, 'extended': False}]
+        )
+        enlarge_rcvbuf(self.bus)
         self.request_id = request_id
         self.response_id = response_id
 
+        # Reused 8-byte transmit frame
+        self._tx_buf = bytearray(8)
+
         print(f"OBD Client initialized")
         print(f"  Sending on CAN ID: 0x{request_id:03X}")
         print(f"  Receiving on CAN ID: 0x{response_id:03X}\n")
 
     def send_request(self, service, *params):
         """Send OBD/UDS request"""
-        payload = bytes([service] + list(params))
-        length = len(payload)
+        length = len(params) + 1
 
         if length <= 7:  # Single frame
-            pci = 0x00 | length
-            data = bytes([pci]) + payload + bytes([0x00] * (7 - length))
+            # Fill the frame in place: PCI, service, params, zero padding
+            data = self._tx_buf
+            data[0] = 0x00 | length
+            data[1] = service
+            data[2:1 + length] = params
+            data[1 + length:] = _PADDING[:7 - length]
 
             msg = can.Message(
                 arbitration_id=self.request_id,
@@ -50,21 +68,23 @@ class OBDClient:
 
     def _wait_for_response(self, timeout=1.0):
         """Wait for response from ECU"""
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
 
-        while time.time() - start_time < timeout:
-            msg = self.bus.recv(timeout=0.1)
+        # Block until a response frame arrives or the deadline passes
+        while (remaining := deadline - time.monotonic()) > 0:
+            msg = self.bus.recv(timeout=remaining)
 
-            if msg and msg.arbitration_id == self.response_id:
-                data = bytes(msg.data)
+            if msg is not None:
+                # Zero-copy view of the frame; only the payload is copied out
+                data = memoryview(msg.data)
                 print(f"← Received: {data.hex()}")
 
                 # Parse single frame
-                pci = data[0] & 0xF0
-                length = data[0] & 0x0F
+                first = data[0]
+                length = first & 0x0F
 
-                if pci == 0x00:  # Single frame
-                    return data[1:1+length]
+                if first >> 4 == 0x0:  # Single frame
+                    return bytes(data[1:1+length])
 
         print("← Timeout: No response")
         return None
@@ -203,35 +223,19 @@ def main():
         print("=" * 60)
 
         client.read_supported_pids()
-        time.sleep(0.5)
-
         client.read_engine_rpm()
-        time.sleep(0.5)
-
         client.read_vehicle_speed()
-        time.sleep(0.5)
-
         client.read_coolant_temp()
-        time.sleep(0.5)
-
         client.read_throttle_position()
-        time.sleep(0.5)
-
         client.read_fuel_level()
-        time.sleep(0.5)
-
         client.read_engine_load()
-        time.sleep(0.5)
 
         # Test UDS requests
         print("\nTesting UDS Requests...")
         print("=" * 60)
 
         client.start_diagnostic_session(0x01)
-        time.sleep(0.5)
-
         client.tester_present()
-        time.sleep(0.5)
 
         print("\n" + "=" * 60)
         print("Testing complete!")
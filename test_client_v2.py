@@ -11,346 +11,533 @@ Comprehensive test suite for Mock OBD-II/UDS system with:
 """
 
 import can
+import io
+import sys
 import time
+import struct
+import asyncio
 import argparse
-from typing import Optional, List
+from collections import deque
+from typing import Optional, Deque, Dict, List, Union
+
+import numpy as np
+
+from lib.can_bus import enable_busy_poll
 from lib.isotp import ISOTPHandler, ISOTPConfig
+from lib.obd_parsers import parse_monitor_status, parse_ascii
+
+# Default busy-poll budget for the CAN socket (microseconds)
+DEFAULT_BUSY_POLL_US = 50
+
+# Response frames held between notifier callbacks and the awaiting request
+RX_QUEUE_LEN = 256
+
+# Recent request round-trip times kept for the suite footer
+RTT_SAMPLES = 1024
+
+# Reassembly buffer size; covers the 12-bit ISO-TP first-frame length
+RX_BUF_SIZE = 4096
+
+# Big-endian 16-bit field (RPM, MAF, DTC count)
+_U16 = struct.Struct('>H')
+
+# Negative response codes (ISO 14229-1) reported by send_request
+_NRC_NAMES = {
+    0x11: 'serviceNotSupported',
+    0x12: 'subFunctionNotSupported',
+    0x13: 'incorrectMessageLength',
+    0x22: 'conditionsNotCorrect',
+    0x24: 'requestSequenceError',
+    0x31: 'requestOutOfRange',
+    0x33: 'securityAccessDenied',
+    0x35: 'invalidKey',
+    0x36: 'exceededNumberOfAttempts',
+    0x7E: 'subFunctionNotSupportedInActiveSession',
+    0x7F: 'serviceNotSupportedInActiveSession',
+}
+
+# DTC letter from the top two bits of the first DTC byte
+_DTC_TYPES = np.array(['P', 'C', 'B', 'U'])
+
+
+def _decode_dtcs(data: Union[bytes, memoryview], offset: int, count: int) -> List[str]:
+    """
+    Decode packed 2-byte DTCs with NumPy instead of a per-DTC byte loop
+
+    Args:
+        data: Response payload
+        offset: Index of the first DTC byte
+        count: Number of DTCs to decode
+
+    Returns:
+        DTC codes such as "P0301"
+    """
+    arr = np.frombuffer(data, dtype=np.uint8, count=2 * count, offset=offset).reshape(count, 2)
+    hi = arr[:, 0]
+    lo = arr[:, 1]
+    types = _DTC_TYPES[hi >> 6].tolist()
+    d1 = ((hi >> 4) & 0x03).tolist()
+    d2 = (hi & 0x0F).tolist()
+    d3 = (lo >> 4).tolist()
+    d4 = (lo & 0x0F).tolist()
+    return [f"{t}{a}{b:X}{c:X}{d:X}" for t, a, b, c, d in zip(types, d1, d2, d3, d4)]
+
+
+class _RxListener(can.Listener):
+    """Queues response frames from the notifier and wakes the awaiting request"""
+
+    def __init__(self, response_id: int, loop: asyncio.AbstractEventLoop):
+        """
+        Args:
+            response_id: CAN ID of the ECU's responses
+            loop: Event loop the client awaits on
+        """
+        self.response_id = response_id
+        self.matched: Deque[can.Message] = deque(maxlen=RX_QUEUE_LEN)
+        self.ready = asyncio.Event()
+        self._loop = loop
+
+    def on_message_received(self, msg: can.Message):
+        if msg.arbitration_id == self.response_id:
+            self.matched.append(msg)
+            # May run on the notifier thread; asyncio.Event is not thread-safe
+            self._loop.call_soon_threadsafe(self.ready.set)
 
 
 class AdvancedOBDClient:
     """Advanced OBD/UDS client with multi-frame support"""
 
-    def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8):
+    # Fixed request payloads (service + PID/DID/sub-function)
+    _REQ_MONITOR_STATUS = b'\x01\x01'
+    _REQ_READ_DTCS = b'\x03'
+    _REQ_READ_PENDING_DTCS = b'\x07'
+    _REQ_CLEAR_DTCS = b'\x04'
+    _REQ_READ_VIN = b'\x09\x02'
+    _REQ_EXTENDED_SESSION = b'\x10\x03'
+    _REQ_SEC_SEED = b'\x27\x01'
+    _REQ_SEC_KEY = b'\x27\x02'
+    # Fixed-length VIN first; the variable-length version DID must stay last
+    _REQ_DID_VIN_SW_VERSION = b'\x22\xf1\x90\xf1\x8e'
+    _REQ_DTC_COUNT = b'\x19\x01\xff'
+    _REQ_TESTER_PRESENT = b'\x3e\x00'
+
+    # Mode 01 PID -> data bytes that follow it in a (multi-PID) response
+    _MODE01_LEN = {0x01: 4, 0x04: 1, 0x05: 1, 0x0C: 2, 0x0D: 1, 0x10: 2}
+
+    # DID -> data length, for walking multi-DID 0x22 responses. Only
+    # fixed-length DIDs belong here; a variable-length DID is requested last
+    # and its value runs to the end of the response.
+    _DID_LEN = {0xF190: 17}
+    _DID_VARIABLE_LAST = 0xF18E
+
+    # Single-value Mode 01 tests for _run_table:
+    # (label, request, min response length, decoder)
+    _TESTS_MODE01 = (
+        ("Engine RPM", b'\x01\x0c', 4, lambda r: f"{_U16.unpack_from(r, 2)[0] / 4:.0f} RPM"),
+        ("Vehicle Speed", b'\x01\x0d', 3, lambda r: f"{r[2]} km/h"),
+        ("Coolant Temperature", b'\x01\x05', 3, lambda r: f"{r[2] - 40}°C"),
+        ("Engine Load", b'\x01\x04', 3, lambda r: f"{r[2] * 100 / 255:.1f}%"),
+        ("MAF Air Flow", b'\x01\x10', 4, lambda r: f"{_U16.unpack_from(r, 2)[0] / 100:.2f} g/s"),
+    )
+
+    def __init__(self, can_interface='vcan0', request_id=0x7E0, response_id=0x7E8,
+                 busy_poll_us: int = DEFAULT_BUSY_POLL_US):
         """
         Initialize OBD Client
 
+        Must be created inside a running event loop: received frames are
+        delivered to it by a can.Notifier bound to that loop.
+
         Args:
             can_interface: CAN interface name
             request_id: CAN ID to send requests
             response_id: CAN ID to receive responses
+            busy_poll_us: SO_BUSY_POLL budget in microseconds (0 disables)
         """
+        # Fails outside an event loop; checked before any socket is opened
+        loop = asyncio.get_running_loop()
+
         self.bus = can.Bus(interface='socketcan', channel=can_interface)
+
+        # Kernel filter: only the ECU's responses (and its flow control, sent
+        # on the same ID) reach user space
+        self.bus.set_filters([{'can_id': response_id, 'can_mask': 0x7FF, 'extended': False}])
+
+        if busy_poll_us > 0:
+            enable_busy_poll(self.bus, busy_poll_us)
         self.request_id = request_id
         self.response_id = response_id
 
         # ISO-TP handler for multi-frame support
         self.isotp = ISOTPHandler(self.bus, request_id, response_id, ISOTPConfig())
 
+        # Background receive: the notifier drains the bus continuously and
+        # queues response frames for whichever request is waiting
+        self._rx = _RxListener(response_id, loop)
+        self._notifier = can.Notifier(self.bus, [self._rx], loop=loop)
+
+        # Multi-frame responses are reassembled in place here
+        self._rx_buf = bytearray(RX_BUF_SIZE)
+
+        # Test output, buffered and written once per suite
+        self._out = io.StringIO()
+
+        # One outstanding request per ISO-TP channel
+        self._lock = asyncio.Lock()
+
+        # Minimum request spacing: the ISO-TP separation time, not a fixed sleep
+        self._min_sep_ns = self.isotp.sender.config.stmin * 1_000_000
+        self._last_tx_ns = 0
+
+        # Request -> complete response latency (ns)
+        self._rtt_samples: Deque[int] = deque(maxlen=RTT_SAMPLES)
+
         print(f"Advanced OBD Client initialized")
         print(f"  Sending on CAN ID: 0x{request_id:03X}")
         print(f"  Receiving on CAN ID: 0x{response_id:03X}")
         print(f"  ISO-TP: Multi-frame support enabled\n")
 
-    def send_request(self, payload: bytes, timeout: float = 2.0) -> Optional[bytes]:
+    def _emit(self, text: str = ""):
+        """Buffer one line of test output (see _flush)"""
+        self._out.write(text)
+        self._out.write("\n")
+
+    def _flush(self):
+        """Write buffered test output to stdout in a single call"""
+        sys.stdout.write(self._out.getvalue())
+        sys.stdout.flush()
+        self._out.seek(0)
+        self._out.truncate()
+
+    async def send_request(self, payload: bytes, timeout: float = 2.0) -> Optional[memoryview]:
         """
         Send request and wait for response (handles multi-frame)
 
+        Concurrent callers are serialized, since the ECU answers one request
+        at a time on this request/response ID pair.
+
         Args:
             payload: Request payload bytes
             timeout: Response timeout in seconds
 
         Returns:
-            Response payload or None
+            Read-only view of the response payload (slices are zero-copy),
+            or None. A multi-frame payload lives in the client's reassembly
+            buffer and is only valid until the next request; copy anything
+            kept longer.
         """
-        # Send using ISO-TP
-        success = self.isotp.send(payload)
-        if not success:
-            print(f"✗ Failed to send request")
-            return None
+        async with self._lock:
+            # Drop frames left over from an earlier timed-out request
+            self._rx.matched.clear()
 
-        print(f"→ Sent: {payload.hex()}")
+            # Wait out whatever remains of the separation time
+            delay_ns = self._min_sep_ns - (time.monotonic_ns() - self._last_tx_ns)
+            if delay_ns > 0:
+                await asyncio.sleep(delay_ns / 1e9)
 
-        # Wait for response (may be multi-frame)
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            msg = self.bus.recv(timeout=0.1)
+            # Send using ISO-TP
+            success = self.isotp.send(payload)
+            tx_ns = self._last_tx_ns = time.monotonic_ns()
+            if not success:
+                self._emit(f"✗ Failed to send request")
+                return None
 
-            if msg and msg.arbitration_id == self.response_id:
-                response = self.isotp.receive_frame(msg)
+            self._emit(f"→ Sent: {payload.hex()}")
 
+            # Wait for response (may be multi-frame)
+            try:
+                response = await asyncio.wait_for(self._receive_response(), timeout)
+            except asyncio.TimeoutError:
+                self._emit("✗ Timeout: No response")
+                return None
+            self._rtt_samples.append(time.monotonic_ns() - tx_ns)
+
+            view = memoryview(response).toreadonly()
+            self._emit(f"← Received: {view[:20].hex()}{'...' if len(view) > 20 else ''} ({len(view)} bytes)")
+
+            if view[0] == 0x7F and len(view) >= 3:
+                nrc = view[2]
+                self._emit(f"✗ Negative response: {_NRC_NAMES.get(nrc, 'unknown')} (0x{nrc:02X})")
+            return view
+
+    @staticmethod
+    def _is_positive(request: bytes, response: Optional[Union[bytes, memoryview]]) -> bool:
+        """Check for the positive response to request (service ID + 0x40)"""
+        return bool(response) and response[0] == request[0] | 0x40
+
+    async def _receive_response(self) -> Union[bytes, memoryview]:
+        """Feed queued frames to ISO-TP until it completes a payload"""
+        matched = self._rx.matched
+        ready = self._rx.ready
+        receive_frame = self.isotp.receive_frame
+        rx_buf = self._rx_buf
+
+        while True:
+            while matched:
+                response = receive_frame(matched.popleft(), rx_buf)
                 if response is not None:
-                    print(f"← Received: {response[:20].hex()}{'...' if len(response) > 20 else ''} ({len(response)} bytes)")
                     return response
 
-        print("✗ Timeout: No response")
-        return None
-
-    # ==================== OBD-II Mode 01 Tests ====================
-
-    def test_monitor_status(self):
-        """Test Mode 01 PID 01 - Monitor status and readiness"""
-        print("\n[Mode 01 PID 01] Monitor Status")
-        response = self.send_request(bytes([0x01, 0x01]))
+            # Re-check after clearing so a frame queued in between is not missed
+            ready.clear()
+            if not matched:
+                await ready.wait()
 
-        if response and len(response) >= 6 and response[0] == 0x41:
-            mil_on = bool(response[2] & 0x80)
-            dtc_count = response[2] & 0x7F
-
-            print(f"  MIL Status: {'ON' if mil_on else 'OFF'}")
-            print(f"  DTC Count: {dtc_count}")
-
-            # Readiness monitors
-            monitors = [
-                "Misfire", "Fuel System", "Components",
-                "Catalyst", "Heated Catalyst", "EVAP",
-                "Secondary Air", "O2 Sensor", "O2 Heater", "EGR"
-            ]
+    async def query_pids(self, mode: int, pids: List[int]) -> Dict[int, bytes]:
+        """
+        Request up to six PIDs in one frame and split the combined response
 
-            print(f"  Readiness Monitors:")
-            for i, name in enumerate(monitors[:3]):
-                complete = not bool(response[3] & (1 << i))
-                print(f"    {name}: {'✓ Complete' if complete else '✗ Incomplete'}")
+        Args:
+            mode: OBD-II mode (e.g. 0x01)
+            pids: PIDs with a known data length in _MODE01_LEN
 
-            return True
-        return False
+        Returns:
+            PID -> equivalent single-PID response (e.g. 41 0C A B); PIDs the
+            ECU did not answer are missing
+        """
+        response = await self.send_request(bytes([mode, *pids]))
+        results: Dict[int, bytes] = {}
+        if not response or response[0] != mode | 0x40:
+            return results
+
+        i = 1
+        while i < len(response):
+            pid = response[i]
+            length = self._MODE01_LEN.get(pid)
+            if length is None or i + 1 + length > len(response):
+                break
+            results[pid] = bytes((response[0], pid)) + response[i + 1:i + 1 + length]
+            i += 1 + length
+        return results
 
-    def test_engine_rpm(self):
-        """Test Mode 01 PID 0C - Engine RPM"""
-        print("\n[Mode 01 PID 0C] Engine RPM")
-        response = self.send_request(bytes([0x01, 0x0C]))
+    # ==================== OBD-II Mode 01 Tests ====================
 
-        if response and len(response) >= 4 and response[0] == 0x41:
-            rpm = ((response[2] << 8) | response[3]) / 4
-            print(f"  ✓ Engine RPM: {rpm:.0f} RPM")
-            return True
-        return False
+    async def test_monitor_status(self, response: Optional[bytes] = None):
+        """Test Mode 01 PID 01 - Monitor status and readiness"""
+        self._emit("\n[Mode 01 PID 01] Monitor Status")
+        if response is None:
+            response = await self.send_request(self._REQ_MONITOR_STATUS)
 
-    def test_vehicle_speed(self):
-        """Test Mode 01 PID 0D - Vehicle speed"""
-        print("\n[Mode 01 PID 0D] Vehicle Speed")
-        response = self.send_request(bytes([0x01, 0x0D]))
+        if self._is_positive(self._REQ_MONITOR_STATUS, response) and len(response) >= 6:
+            mil_on, dtc_count, monitors = parse_monitor_status(response)
 
-        if response and len(response) >= 3 and response[0] == 0x41:
-            speed = response[2]
-            print(f"  ✓ Vehicle Speed: {speed} km/h")
-            return True
-        return False
+            self._emit(f"  MIL Status: {'ON' if mil_on else 'OFF'}")
+            self._emit(f"  DTC Count: {dtc_count}")
 
-    def test_coolant_temp(self):
-        """Test Mode 01 PID 05 - Coolant temperature"""
-        print("\n[Mode 01 PID 05] Coolant Temperature")
-        response = self.send_request(bytes([0x01, 0x05]))
+            self._emit(f"  Readiness Monitors:")
+            for name, complete in monitors:
+                self._emit(f"    {name}: {'✓ Complete' if complete else '✗ Incomplete'}")
 
-        if response and len(response) >= 3 and response[0] == 0x41:
-            temp = response[2] - 40
-            print(f"  ✓ Coolant Temperature: {temp}°C")
             return True
         return False
 
-    def test_engine_load(self):
-        """Test Mode 01 PID 04 - Engine load"""
-        print("\n[Mode 01 PID 04] Engine Load")
-        response = self.send_request(bytes([0x01, 0x04]))
+    async def _run_table(self, table, responses: Optional[Dict[int, bytes]] = None) -> int:
+        """
+        Run single-value tests described by a table
 
-        if response and len(response) >= 3 and response[0] == 0x41:
-            load = (response[2] * 100) / 255
-            print(f"  ✓ Engine Load: {load:.1f}%")
-            return True
-        return False
+        Args:
+            table: (label, request, min response length, decoder) entries,
+                   e.g. _TESTS_MODE01
+            responses: Already received responses keyed by PID (see
+                       query_pids); anything missing is requested singly
 
-    def test_maf(self):
-        """Test Mode 01 PID 10 - MAF air flow rate"""
-        print("\n[Mode 01 PID 10] MAF Air Flow")
-        response = self.send_request(bytes([0x01, 0x10]))
+        Returns:
+            Number of tests passed
+        """
+        passed = 0
+        for label, request, min_len, decode in table:
+            self._emit(f"\n[Mode {request[0]:02X} PID {request[1]:02X}] {label}")
+            try:
+                response = responses.get(request[1]) if responses else None
+                if response is None:
+                    response = await self.send_request(request)
 
-        if response and len(response) >= 4 and response[0] == 0x41:
-            maf = ((response[2] << 8) | response[3]) / 100
-            print(f"  ✓ MAF: {maf:.2f} g/s")
-            return True
-        return False
+                if self._is_positive(request, response) and len(response) >= min_len:
+                    self._emit(f"  ✓ {label}: {decode(response)}")
+                    passed += 1
+            except Exception as e:
+                self._emit(f"  ✗ Test failed: {e}")
+        return passed
 
     # ==================== OBD-II Mode 03/07/0A Tests ====================
 
-    def test_read_dtcs(self):
+    async def test_read_dtcs(self):
         """Test Mode 03 - Read stored DTCs"""
-        print("\n[Mode 03] Read Stored DTCs")
-        response = self.send_request(bytes([0x03]))
+        self._emit("\n[Mode 03] Read Stored DTCs")
+        response = await self.send_request(self._REQ_READ_DTCS)
 
-        if response and response[0] == 0x43:
+        if self._is_positive(self._REQ_READ_DTCS, response):
             dtc_count = response[1]
-            print(f"  DTC Count: {dtc_count}")
+            self._emit(f"  DTC Count: {dtc_count}")
 
             if dtc_count > 0:
-                for i in range(dtc_count):
-                    if len(response) >= 4 + i * 2:
-                        byte1 = response[2 + i * 2]
-                        byte2 = response[3 + i * 2]
-
-                        # Decode DTC
-                        type_map = ['P', 'C', 'B', 'U']
-                        dtc_type = type_map[(byte1 >> 6) & 0x03]
-                        digit1 = (byte1 >> 4) & 0x03
-                        digit2 = byte1 & 0x0F
-                        digit3 = (byte2 >> 4) & 0x0F
-                        digit4 = byte2 & 0x0F
-
-                        dtc_code = f"{dtc_type}{digit1}{digit2:X}{digit3:X}{digit4:X}"
-                        print(f"    ✓ DTC: {dtc_code}")
+                # Only decode the DTCs actually present in the response
+                present = min(dtc_count, (len(response) - 2) // 2)
+                for dtc_code in _decode_dtcs(response, 2, present):
+                    self._emit(f"    ✓ DTC: {dtc_code}")
             else:
-                print(f"    No DTCs stored")
+                self._emit(f"    No DTCs stored")
 
             return True
         return False
 
-    def test_read_pending_dtcs(self):
+    async def test_read_pending_dtcs(self):
         """Test Mode 07 - Read pending DTCs"""
-        print("\n[Mode 07] Read Pending DTCs")
-        response = self.send_request(bytes([0x07]))
+        self._emit("\n[Mode 07] Read Pending DTCs")
+        response = await self.send_request(self._REQ_READ_PENDING_DTCS)
 
-        if response and response[0] == 0x47:
+        if self._is_positive(self._REQ_READ_PENDING_DTCS, response):
             dtc_count = response[1]
-            print(f"  Pending DTC Count: {dtc_count}")
+            self._emit(f"  Pending DTC Count: {dtc_count}")
             return True
         return False
 
-    def test_clear_dtcs(self):
+    async def test_clear_dtcs(self):
         """Test Mode 04 - Clear DTCs"""
-        print("\n[Mode 04] Clear DTCs")
-        response = self.send_request(bytes([0x04]))
+        self._emit("\n[Mode 04] Clear DTCs")
+        response = await self.send_request(self._REQ_CLEAR_DTCS)
 
-        if response and response[0] == 0x44:
-            print(f"  ✓ DTCs cleared successfully")
+        if self._is_positive(self._REQ_CLEAR_DTCS, response):
+            self._emit(f"  ✓ DTCs cleared successfully")
             return True
         return False
 
     # ==================== OBD-II Mode 09 Tests ====================
 
-    def test_read_vin(self):
+    async def test_read_vin(self):
         """Test Mode 09 PID 02 - Read VIN (multi-frame response)"""
-        print("\n[Mode 09 PID 02] Read VIN (Multi-frame)")
-        response = self.send_request(bytes([0x09, 0x02]))
-
-        if response and response[0] == 0x49:
-            # VIN is in bytes after [49 02 01]
-            vin_bytes = response[3:20]  # 17 bytes
-            vin = vin_bytes.decode('ascii', errors='ignore').rstrip('\x00')
-            print(f"  ✓ VIN: {vin} ({len(vin)} characters)")
+        self._emit("\n[Mode 09 PID 02] Read VIN (Multi-frame)")
+        response = await self.send_request(self._REQ_READ_VIN)
+
+        if self._is_positive(self._REQ_READ_VIN, response):
+            # VIN is the 17 bytes after [49 02 01]
+            vin = parse_ascii(response, 3, 20)
+            self._emit(f"  ✓ VIN: {vin} ({len(vin)} characters)")
             return True
         return False
 
     # ==================== UDS Service Tests ====================
 
-    def test_diagnostic_session(self):
+    async def test_diagnostic_session(self):
         """Test UDS 0x10 - Diagnostic session control"""
-        print("\n[UDS 0x10] Diagnostic Session Control")
+        self._emit("\n[UDS 0x10] Diagnostic Session Control")
 
         # Extended diagnostic session
-        response = self.send_request(bytes([0x10, 0x03]))
+        response = await self.send_request(self._REQ_EXTENDED_SESSION)
 
-        if response and response[0] == 0x50:
-            print(f"  ✓ Extended diagnostic session started")
+        if self._is_positive(self._REQ_EXTENDED_SESSION, response):
+            self._emit(f"  ✓ Extended diagnostic session started")
             return True
         return False
 
-    def test_security_access(self):
+    async def test_security_access(self):
         """Test UDS 0x27 - Security access (seed/key)"""
-        print("\n[UDS 0x27] Security Access")
+        self._emit("\n[UDS 0x27] Security Access")
 
         # Request seed (level 1)
-        print("  Requesting seed...")
-        response = self.send_request(bytes([0x27, 0x01]))
+        self._emit("  Requesting seed...")
+        response = await self.send_request(self._REQ_SEC_SEED)
 
-        if response and response[0] == 0x67:
+        if self._is_positive(self._REQ_SEC_SEED, response):
             seed = int.from_bytes(response[2:6], 'big')
-            print(f"  ✓ Seed received: 0x{seed:08X}")
+            self._emit(f"  ✓ Seed received: 0x{seed:08X}")
 
             # Calculate key (simplified: XOR with constant)
             key = seed ^ 0x12345678
-            print(f"  Sending key: 0x{key:08X}")
+            self._emit(f"  Sending key: 0x{key:08X}")
 
             # Send key
             key_bytes = key.to_bytes(4, 'big')
-            response = self.send_request(bytes([0x27, 0x02]) + key_bytes)
+            response = await self.send_request(self._REQ_SEC_KEY + key_bytes)
 
-            if response and response[0] == 0x67:
-                print(f"  ✓ Security access granted!")
+            if self._is_positive(self._REQ_SEC_KEY, response):
+                self._emit(f"  ✓ Security access granted!")
                 return True
             else:
-                print(f"  ✗ Invalid key")
+                self._emit(f"  ✗ Invalid key")
         return False
 
-    def test_read_did(self):
+    async def test_read_did(self):
         """Test UDS 0x22 - Read Data By Identifier"""
-        print("\n[UDS 0x22] Read Data By Identifier")
-
-        # Read VIN (DID 0xF190)
-        response = self.send_request(bytes([0x22, 0xF1, 0x90]))
-
-        if response and response[0] == 0x62:
-            vin_bytes = response[3:20]
-            vin = vin_bytes.decode('ascii', errors='ignore').rstrip('\x00')
-            print(f"  ✓ VIN (0xF190): {vin}")
-
-        # Read software version (DID 0xF18E)
-        response = self.send_request(bytes([0x22, 0xF1, 0x8E]))
-
-        if response and response[0] == 0x62:
-            sw_version = response[3:].decode('ascii', errors='ignore').rstrip('\x00')
-            print(f"  ✓ Software Version (0xF18E): {sw_version}")
+        self._emit("\n[UDS 0x22] Read Data By Identifier")
+
+        # VIN (DID 0xF190) and software version (DID 0xF18E) in one request
+        response = await self.send_request(self._REQ_DID_VIN_SW_VERSION)
+        if not self._is_positive(self._REQ_DID_VIN_SW_VERSION, response):
+            return False
+
+        values = {}
+        i = 1
+        while i + 2 <= len(response):
+            did = _U16.unpack_from(response, i)[0]
+            length = self._DID_LEN.get(did)
+            if length is None:
+                if did != self._DID_VARIABLE_LAST:
+                    break
+                length = len(response) - i - 2
+            values[did] = parse_ascii(response, i + 2, i + 2 + length)
+            i += 2 + length
+
+        if 0xF190 in values:
+            self._emit(f"  ✓ VIN (0xF190): {values[0xF190]}")
+        if 0xF18E in values:
+            self._emit(f"  ✓ Software Version (0xF18E): {values[0xF18E]}")
             return True
 
         return False
 
-    def test_read_dtc_info(self):
+    async def test_read_dtc_info(self):
         """Test UDS 0x19 - Read DTC information"""
-        print("\n[UDS 0x19] Read DTC Information")
+        self._emit("\n[UDS 0x19] Read DTC Information")
 
         # Sub 0x01: Report number of DTCs
-        response = self.send_request(bytes([0x19, 0x01, 0xFF]))
+        response = await self.send_request(self._REQ_DTC_COUNT)
 
-        if response and response[0] == 0x59:
-            dtc_count_high = response[4] if len(response) > 4 else 0
-            dtc_count_low = response[5] if len(response) > 5 else 0
-            dtc_count = (dtc_count_high << 8) | dtc_count_low
-            print(f"  ✓ DTC Count: {dtc_count}")
+        if self._is_positive(self._REQ_DTC_COUNT, response):
+            dtc_count = _U16.unpack_from(response, 4)[0] if len(response) >= 6 else 0
+            self._emit(f"  ✓ DTC Count: {dtc_count}")
             return True
         return False
 
-    def test_tester_present(self):
+    async def test_tester_present(self):
         """Test UDS 0x3E - Tester present"""
-        print("\n[UDS 0x3E] Tester Present")
-        response = self.send_request(bytes([0x3E, 0x00]))
+        self._emit("\n[UDS 0x3E] Tester Present")
+        response = await self.send_request(self._REQ_TESTER_PRESENT)
 
-        if response and response[0] == 0x7E:
-            print(f"  ✓ Tester present acknowledged")
+        if self._is_positive(self._REQ_TESTER_PRESENT, response):
+            self._emit(f"  ✓ Tester present acknowledged")
             return True
         return False
 
     # ==================== Test Suites ====================
 
-    def run_obd_basic_tests(self):
+    async def run_obd_basic_tests(self):
         """Run basic OBD-II tests"""
-        print("\n" + "=" * 60)
-        print("OBD-II Basic Test Suite")
-        print("=" * 60)
+        self._emit("\n" + "=" * 60)
+        self._emit("OBD-II Basic Test Suite")
+        self._emit("=" * 60)
 
-        tests = [
-            self.test_monitor_status,
-            self.test_engine_rpm,
-            self.test_vehicle_speed,
-            self.test_coolant_temp,
-            self.test_engine_load,
-            self.test_maf,
-        ]
+        table = self._TESTS_MODE01
+
+        # One multi-PID request; PIDs missing from the answer are re-requested singly
+        responses = await self.query_pids(0x01, [0x01] + [request[1] for _, request, _, _ in table])
 
         passed = 0
-        for test in tests:
-            try:
-                if test():
-                    passed += 1
-                time.sleep(0.3)
-            except Exception as e:
-                print(f"  ✗ Test failed: {e}")
+        try:
+            if await self.test_monitor_status(responses.get(0x01)):
+                passed += 1
+        except Exception as e:
+            self._emit(f"  ✗ Test failed: {e}")
+        passed += await self._run_table(table, responses)
 
-        print(f"\n{'=' * 60}")
-        print(f"Results: {passed}/{len(tests)} tests passed")
-        print("=" * 60)
+        self._emit_results(passed, len(table) + 1)
+        self._flush()
 
-    def run_dtc_tests(self):
+    async def run_dtc_tests(self):
         """Run DTC-related tests"""
-        print("\n" + "=" * 60)
-        print("DTC Test Suite")
-        print("=" * 60)
+        self._emit("\n" + "=" * 60)
+        self._emit("DTC Test Suite")
+        self._emit("=" * 60)
 
         tests = [
             self.test_read_dtcs,
@@ -360,21 +547,19 @@ class AdvancedOBDClient:
         passed = 0
         for test in tests:
             try:
-                if test():
+                if await test():
                     passed += 1
-                time.sleep(0.3)
             except Exception as e:
-                print(f"  ✗ Test failed: {e}")
+                self._emit(f"  ✗ Test failed: {e}")
 
-        print(f"\n{'=' * 60}")
-        print(f"Results: {passed}/{len(tests)} tests passed")
-        print("=" * 60)
+        self._emit_results(passed, len(tests))
+        self._flush()
 
-    def run_multiframe_tests(self):
+    async def run_multiframe_tests(self):
         """Run multi-frame message tests"""
-        print("\n" + "=" * 60)
-        print("Multi-Frame Test Suite")
-        print("=" * 60)
+        self._emit("\n" + "=" * 60)
+        self._emit("Multi-Frame Test Suite")
+        self._emit("=" * 60)
 
         tests = [
             self.test_read_vin,
@@ -383,21 +568,19 @@ class AdvancedOBDClient:
         passed = 0
         for test in tests:
             try:
-                if test():
+                if await test():
                     passed += 1
-                time.sleep(0.3)
             except Exception as e:
-                print(f"  ✗ Test failed: {e}")
+                self._emit(f"  ✗ Test failed: {e}")
 
-        print(f"\n{'=' * 60}")
-        print(f"Results: {passed}/{len(tests)} tests passed")
-        print("=" * 60)
+        self._emit_results(passed, len(tests))
+        self._flush()
 
-    def run_uds_tests(self):
+    async def run_uds_tests(self):
         """Run UDS service tests"""
-        print("\n" + "=" * 60)
-        print("UDS Service Test Suite")
-        print("=" * 60)
+        self._emit("\n" + "=" * 60)
+        self._emit("UDS Service Test Suite")
+        self._emit("=" * 60)
 
         tests = [
             self.test_tester_present,
@@ -410,28 +593,66 @@ class AdvancedOBDClient:
         passed = 0
         for test in tests:
             try:
-                if test():
+                if await test():
                     passed += 1
-                time.sleep(0.3)
             except Exception as e:
-                print(f"  ✗ Test failed: {e}")
+                self._emit(f"  ✗ Test failed: {e}")
+
+        self._emit_results(passed, len(tests))
+        self._flush()
 
-        print(f"\n{'=' * 60}")
-        print(f"Results: {passed}/{len(tests)} tests passed")
-        print("=" * 60)
+    def _emit_results(self, passed: int, total: int):
+        """Emit the suite footer: pass count and round-trip latency"""
+        self._emit(f"\n{'=' * 60}")
+        self._emit(f"Results: {passed}/{total} tests passed")
 
-    def run_all_tests(self):
+        samples = sorted(self._rtt_samples)
+        if samples:
+            n = len(samples)
+            self._emit(f"Round trip (last {n}): min {samples[0] / 1000:.0f} µs, "
+                       f"p50 {samples[n // 2] / 1000:.0f} µs, "
+                       f"p99 {samples[min(n - 1, n * 99 // 100)] / 1000:.0f} µs")
+        self._emit("=" * 60)
+
+    async def run_all_tests(self):
         """Run all test suites"""
-        self.run_obd_basic_tests()
-        self.run_dtc_tests()
-        self.run_multiframe_tests()
-        self.run_uds_tests()
+        await self.run_obd_basic_tests()
+        await self.run_dtc_tests()
+        await self.run_multiframe_tests()
+        await self.run_uds_tests()
 
     def close(self):
-        """Close the CAN bus connection"""
+        """Stop the notifier and close the CAN bus connection"""
+        self._flush()
+        self._notifier.stop()
         self.bus.shutdown()
 
 
+async def run_client(args: argparse.Namespace):
+    """Create the client on the running loop and run the selected suite"""
+    client = AdvancedOBDClient(
+        can_interface=args.interface,
+        request_id=args.request_id,
+        response_id=args.response_id,
+        busy_poll_us=args.busy_poll_us
+    )
+
+    try:
+        if args.test == 'all':
+            await client.run_all_tests()
+        elif args.test == 'obd':
+            await client.run_obd_basic_tests()
+        elif args.test == 'dtc':
+            await client.run_dtc_tests()
+        elif args.test == 'multiframe':
+            await client.run_multiframe_tests()
+        elif args.test == 'uds':
+            await client.run_uds_tests()
+
+    finally:
+        client.close()
+
+
 def main():
     """Main test function"""
     parser = argparse.ArgumentParser(description='Advanced OBD/UDS Test Client')
@@ -442,6 +663,9 @@ def main():
                        help='Response CAN ID (default: 0x7E8)')
     parser.add_argument('--test', choices=['all', 'obd', 'dtc', 'multiframe', 'uds'],
                        default='all', help='Test suite to run')
+    parser.add_argument('--busy-poll-us', type=int, default=DEFAULT_BUSY_POLL_US,
+                       help=f'SO_BUSY_POLL budget in microseconds, 0 to disable '
+                            f'(default: {DEFAULT_BUSY_POLL_US})')
     args = parser.parse_args()
 
     print("=" * 60)
@@ -449,30 +673,12 @@ def main():
     print("=" * 60)
     print()
 
-    client = AdvancedOBDClient(
-        can_interface=args.interface,
-        request_id=args.request_id,
-        response_id=args.response_id
-    )
-
     try:
-        if args.test == 'all':
-            client.run_all_tests()
-        elif args.test == 'obd':
-            client.run_obd_basic_tests()
-        elif args.test == 'dtc':
-            client.run_dtc_tests()
-        elif args.test == 'multiframe':
-            client.run_multiframe_tests()
-        elif args.test == 'uds':
-            client.run_uds_tests()
+        asyncio.run(run_client(args))
 
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
 
-    finally:
-        client.close()
-
 
 if __name__ == '__main__':
     main()